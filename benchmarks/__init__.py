@@ -0,0 +1 @@
+"""Benchmarks for the EOB engine and PDF renderer; run with ``python -m benchmarks``."""
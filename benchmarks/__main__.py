@@ -0,0 +1,128 @@
+"""Minimal asv-style benchmark runner.
+
+Benchmarks live in ``benchmarks/bench_*.py`` as classes with ``time_*``
+methods, optional ``params``/``param_names`` and a ``setup`` taking the same
+parameters (raise ``NotImplementedError`` to skip a combination) and an
+optional ``teardown``, the same layout asv uses.
+
+    python -m benchmarks                         # run everything
+    python -m benchmarks -k Pdf --save base.json # filter, save medians
+    python -m benchmarks --compare base.json     # exit 1 on >20% slowdowns
+
+Import-time budgets are checked separately by ``python -m benchmarks.imports``,
+the vectorized engine against the scalar one by
+``python -m benchmarks.equivalence`` and bad inputs by
+``python -m benchmarks.validation``.
+"""
+import argparse
+import importlib
+import itertools
+import json
+import pkgutil
+import re
+import statistics
+import sys
+import time
+
+import benchmarks
+
+# Aim for timing batches of at least this long, REPEAT times per case.
+MIN_BATCH_SECONDS = 0.05
+REPEAT = 5
+
+
+def discover():
+    """Yield ``(name, cls, method_name, params)`` for every benchmark case."""
+    for info in sorted(pkgutil.iter_modules(benchmarks.__path__), key=lambda m: m.name):
+        if not info.name.startswith("bench_"):
+            continue
+        module = importlib.import_module(f"benchmarks.{info.name}")
+        for cls_name, cls in sorted(vars(module).items()):
+            if not (isinstance(cls, type) and cls.__module__ == module.__name__):
+                continue
+            params = getattr(cls, "params", ())
+            if params and not isinstance(params[0], (list, tuple)):
+                params = (params,)
+            for method in sorted(m for m in vars(cls) if m.startswith("time_")):
+                for combo in itertools.product(*params):
+                    args = ", ".join(map(repr, combo))
+                    yield f"{info.name}.{cls_name}.{method}({args})", cls, method, combo
+
+
+def time_case(cls, method, combo):
+    """Median and min seconds per call, or None if the case is skipped."""
+    bench = cls()
+    try:
+        if hasattr(bench, "setup"):
+            bench.setup(*combo)
+        fn = getattr(bench, method)
+        start = time.perf_counter()
+        fn(*combo)
+        first = time.perf_counter() - start
+    except NotImplementedError:
+        return None
+    number = max(1, int(MIN_BATCH_SECONDS / max(first, 1e-9)))
+    repeat = REPEAT if first < 1.0 else 1
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(*combo)
+        samples.append((time.perf_counter() - start) / number)
+    if hasattr(bench, "teardown"):
+        bench.teardown(*combo)
+    return statistics.median(samples), min(samples)
+
+
+def _fmt(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit}"
+    return f"{seconds / 1e-9:8.2f} ns"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the FSAdmin benchmarks.")
+    parser.add_argument("-k", dest="pattern", help="only run benchmarks whose name matches this regex")
+    parser.add_argument("--save", help="write median seconds per benchmark to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON from --save; fail on regressions")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="slowdown ratio counted as a regression (default 1.2)")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    results = {}
+    regressions = []
+    for name, cls, method, combo in discover():
+        if args.pattern and not re.search(args.pattern, name):
+            continue
+        timing = time_case(cls, method, combo)
+        if timing is None:
+            print(f"{'skipped':>11}   {name}")
+            continue
+        median, best = timing
+        results[name] = median
+        line = f"{_fmt(median)}   {name}"
+        if name in baseline:
+            ratio = median / baseline[name]
+            line += f"   x{ratio:.2f}"
+            if ratio > args.threshold:
+                regressions.append(name)
+                line += "  REGRESSION"
+        print(line, flush=True)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over x{args.threshold}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
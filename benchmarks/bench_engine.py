@@ -0,0 +1,66 @@
+"""Schedule loop, setup table and totals."""
+from fsadmin.engine import build_schedule, build_setup_lines, compile_fee_schedule, compute_totals
+from fsadmin.tables import setup_rows
+
+from .synthetic import FEE_SIZES, fee_schedule, patients
+
+
+class TimeScheduleScalar:
+    # 100k patients x 120 months takes minutes in the scalar loop; that size
+    # is what the vectorized engine is for.
+    params = ([1, 1_000], [10, 120], FEE_SIZES)
+    param_names = ["patients", "months", "fees"]
+
+    def setup(self, n, months, fees):
+        self.fees = compile_fee_schedule(fee_schedule(fees, months))
+        self.patients = patients(n)
+
+    def time_build_schedule(self, n, months, fees):
+        for p in self.patients:
+            build_schedule(p, self.fees)
+
+
+class TimeScheduleVectorized:
+    params = ([1, 1_000, 100_000], [10, 120], FEE_SIZES)
+    param_names = ["patients", "months", "fees"]
+
+    def setup(self, n, months, fees):
+        self.fees = compile_fee_schedule(fee_schedule(fees, months))
+        self.patients = patients(n)
+
+    def time_estimate_many(self, n, months, fees):
+        from fsadmin.vectorized import estimate_many
+
+        estimate_many(self.patients, self.fees)
+
+
+class TimeSetupTable:
+    params = (FEE_SIZES,)
+    param_names = ["fees"]
+
+    def setup(self, fees):
+        self.fees = fee_schedule(fees)
+        self.lines = build_setup_lines(self.fees)
+
+    def time_setup_lines(self, fees):
+        build_setup_lines(self.fees)
+
+    def time_setup_rows(self, fees):
+        setup_rows(self.lines)
+
+
+class TimeTotals:
+    params = ([10, 120], FEE_SIZES)
+    param_names = ["months", "fees"]
+
+    def setup(self, months, fees):
+        self.raw_fees = fee_schedule(fees, months)
+        self.fees = compile_fee_schedule(self.raw_fees)
+        self.setup_lines = build_setup_lines(self.fees)
+        self.schedule = build_schedule(patients(1)[0], self.fees)
+
+    def time_totals(self, months, fees):
+        compute_totals(self.setup_lines, self.schedule, self.fees)
+
+    def time_compile_fee_schedule(self, months, fees):
+        compile_fee_schedule(self.raw_fees)
@@ -0,0 +1,42 @@
+"""Persistent estimate store: lookups against computing the estimate."""
+import os
+import tempfile
+
+from fsadmin.engine import compile_fee_schedule, estimate
+from fsadmin.estimates import EstimateStore
+
+from .synthetic import FEE_SIZES, fee_schedule, patients
+
+
+class TimeEstimateStore:
+    params = (FEE_SIZES, [10, 120])
+    param_names = ["fees", "months"]
+
+    def setup(self, fees, months):
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.store = EstimateStore(self.path)
+        self.fees = compile_fee_schedule(fee_schedule(fees, months))
+        self.patients = patients(1_000)
+        for p in self.patients:
+            self.store.estimate(p, self.fees)
+
+    def teardown(self, fees, months):
+        self.store.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def time_compute(self, fees, months):
+        for p in self.patients:
+            estimate(p, self.fees)
+
+    def time_hit(self, fees, months):
+        for p in self.patients:
+            self.store.estimate(p, self.fees)
+
+    def time_miss(self, fees, months):
+        # Compute and save every patient into an emptied store.
+        self.store.clear()
+        for p in self.patients:
+            self.store.estimate(p, self.fees)
@@ -0,0 +1,39 @@
+"""Fee schedule store lookups."""
+import os
+import tempfile
+from datetime import date
+
+from fsadmin.fees import FeeScheduleStore
+
+from .synthetic import fee_schedule
+
+
+class TimeFeeStore:
+    params = ([200, 5_000],)
+    param_names = ["codes"]
+
+    def setup(self, codes):
+        items = fee_schedule("large")
+        items = [dict(items[n % len(items)], code=f"X{n:05d}") for n in range(codes)]
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.store = FeeScheduleStore(self.path)
+        self.store.put("P1", items, date(2024, 1, 1), date(2025, 1, 1))
+        self.store.put("P1", items, date(2025, 1, 1))
+        self.warm = self.store.schedule("P1", date(2024, 6, 1))
+
+    def teardown(self, codes):
+        self.store.close()
+        os.remove(self.path)
+
+    def time_resolve_cold(self, codes):
+        self.store.reload()
+        self.store.schedule("P1", date(2024, 6, 1))
+
+    def time_resolve_cached(self, codes):
+        self.store.schedule("P1", date(2024, 6, 1))
+
+    def time_code_lookup(self, codes):
+        get = self.warm.get
+        for n in range(0, codes, 7):
+            get(f"X{n:05d}")
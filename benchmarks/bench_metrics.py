@@ -0,0 +1,22 @@
+"""Cost of reporting into the metrics registry, and of rendering it."""
+from fsadmin.metrics import Operation, Registry
+
+
+class TimeMetrics:
+    def setup(self):
+        self.registry = Registry()
+        self.op = Operation(self.registry, "bench_ops", "Ops")
+        self.lookups = self.registry.counter("bench_lookups_total", "Lookups.", ("cache", "result"))
+        for _ in range(1000):
+            with self.op.track():
+                pass
+
+    def time_track(self):
+        with self.op.track():
+            pass
+
+    def time_labelled_inc(self):
+        self.lookups.inc("pdf_memory", "hit")
+
+    def time_to_prometheus(self):
+        self.registry.to_prometheus()
@@ -0,0 +1,41 @@
+"""Claim-line arithmetic in integer cents against ``decimal.Decimal`` and floats.
+
+Each variant applies a 20% coinsurance to every line, rounded half-up to the
+cent, and sums the results.
+"""
+import random
+from decimal import ROUND_HALF_UP, Decimal
+
+from fsadmin.money import apply_rate, to_cents, to_cents_array, to_ppm
+
+RATE = 0.2
+
+
+class TimeMoney:
+    params = ([100_000],)
+    param_names = ["lines"]
+
+    def setup(self, n):
+        rng = random.Random(n)
+        self.amounts = [round(rng.uniform(1, 500), 2) for _ in range(n)]
+        self.cents = [to_cents(a) for a in self.amounts]
+        self.decimals = [Decimal(repr(a)) for a in self.amounts]
+
+    def time_cents(self, n):
+        ppm = to_ppm(RATE)
+        sum(apply_rate(c, ppm) for c in self.cents)
+
+    def time_decimal(self, n):
+        rate, cent = Decimal(repr(RATE)), Decimal("0.01")
+        sum((d * rate).quantize(cent, ROUND_HALF_UP) for d in self.decimals)
+
+    def time_float(self, n):
+        # What the engine used to do; not exact.
+        sum(round(a * RATE, 2) for a in self.amounts)
+
+    def time_to_cents(self, n):
+        for a in self.amounts:
+            to_cents(a)
+
+    def time_to_cents_array(self, n):
+        to_cents_array(self.amounts)
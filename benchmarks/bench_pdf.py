@@ -0,0 +1,23 @@
+"""ReportLab build of the EOB statement."""
+from datetime import date
+
+from fsadmin.engine import estimate
+
+from .synthetic import FEE_SIZES, fee_schedule, patients
+
+
+class TimePdf:
+    params = ([10, 120], FEE_SIZES)
+    param_names = ["months", "fees"]
+
+    def setup(self, months, fees):
+        from fsadmin.pdf import get_assets
+
+        get_assets()  # the asset cache is warm in a running app
+        self.result = estimate(patients(1)[0], fee_schedule(fees, months))
+
+    def time_render_pdf(self, months, fees):
+        from fsadmin.pdf import render_pdf
+
+        r = self.result
+        render_pdf(r.setup, r.schedule, r.totals, date(2024, 1, 1))
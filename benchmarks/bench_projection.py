@@ -0,0 +1,53 @@
+"""Multi-year projection (13-month capped rental plus five years) and resupply."""
+from fsadmin.engine import compile_fee_schedule
+from fsadmin.projection import project
+
+from .synthetic import FEE_SIZES, fee_schedule, patients
+
+MONTHS = 73
+
+
+class TimeProjectionScalar:
+    params = ([1, 1_000], FEE_SIZES)
+    param_names = ["patients", "fees"]
+
+    def setup(self, n, fees):
+        self.fees = compile_fee_schedule(fee_schedule(fees, 13))
+        self.patients = patients(n)
+
+    def time_project(self, n, fees):
+        for p in self.patients:
+            project(p, self.fees, MONTHS)
+
+
+class TimeProjectionVectorized:
+    params = ([1_000, 100_000], FEE_SIZES)
+    param_names = ["patients", "fees"]
+
+    def setup(self, n, fees):
+        self.fees = compile_fee_schedule(fee_schedule(fees, 13))
+        self.patients = patients(n)
+
+    def time_project_many(self, n, fees):
+        from fsadmin.vectorized import project_many
+
+        project_many(self.patients, self.fees, MONTHS)
+
+
+class TimeResupply:
+    # Rental plus the default resupply rules; 1200 months shows the event
+    # queue stays linear in the number of claims.
+    params = ([1, 1_000], [MONTHS, 1200])
+    param_names = ["patients", "months"]
+
+    def setup(self, n, months):
+        if n > 1 and months > MONTHS:
+            raise NotImplementedError
+        self.fees = compile_fee_schedule(fee_schedule("small", 13))
+        self.patients = patients(n)
+
+    def time_project_claims(self, n, months):
+        from fsadmin.resupply import project_claims
+
+        for p in self.patients:
+            project_claims(p, self.fees, months)
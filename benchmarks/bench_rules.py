@@ -0,0 +1,30 @@
+"""Schedule loop under each registered payer rule.
+
+Parameterized over the registry, so a newly registered rule is benchmarked
+without touching this file.  ``commercial_coinsurance`` is the default path
+that :class:`benchmarks.bench_engine` times as well.
+"""
+from fsadmin.engine import build_schedule, compile_fee_schedule
+from fsadmin.rules import RULES
+
+from .synthetic import FEE_SIZES, fee_schedule, patients
+
+
+class TimeRules:
+    params = (sorted(RULES), FEE_SIZES)
+    param_names = ["rule", "fees"]
+
+    def setup(self, rule, fees):
+        self.rule = RULES[rule]
+        self.fees = compile_fee_schedule(fee_schedule(fees))
+        self.patients = patients(1_000)
+        # The rule's rental table is built once per fee schedule; keep it out of the timing.
+        self.rule.compile(self.patients[0], self.fees)
+
+    def time_schedule(self, rule, fees):
+        for p in self.patients:
+            build_schedule(p, self.fees, rule=self.rule)
+
+    def time_compile(self, rule, fees):
+        for p in self.patients:
+            self.rule.compile(p, self.fees)
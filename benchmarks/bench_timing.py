@@ -0,0 +1,24 @@
+"""Cost of the page's stage timers, disabled (the default) and enabled."""
+from fsadmin.timing import StageTimer
+
+STAGES = ("widgets", "params", "setup_df", "data_editor", "schedule", "tables", "totals", "pdf_key")
+
+
+class TimeStageTimer:
+    params = ([False, True],)
+    param_names = ["enabled"]
+
+    def setup(self, enabled):
+        self.timer = StageTimer(enabled=enabled)
+
+    def time_run(self, enabled):
+        # One page rerun's worth of timer calls, with nothing inside the stages.
+        timer = self.timer
+        timer.start_run()
+        for name in STAGES:
+            with timer.stage(name):
+                pass
+        timer.finish_run()
+
+    def time_summary(self, enabled):
+        self.timer.summary()
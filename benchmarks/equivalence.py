@@ -0,0 +1,111 @@
+"""Scalar vs vectorized engine, which must agree to the cent.
+
+:func:`fsadmin.vectorized.estimate_many` and :func:`~fsadmin.vectorized.project_many`
+are run on random patients against the scalar :func:`fsadmin.engine.estimate`
+and :func:`fsadmin.projection.project`, over the CPAP schedule, the CPAP
+schedule with mixed rental lengths and the large synthetic schedule.  Every
+month row and every total is compared exactly; any mismatch fails the check.
+
+    python -m benchmarks.equivalence                 # exit 1 on any mismatch
+    python -m benchmarks.equivalence --patients 50000
+"""
+import argparse
+import calendar
+import random
+import sys
+from datetime import date
+
+from fsadmin.engine import FEE_SCHEDULE, InsuranceParams, compile_fee_schedule, estimate
+from fsadmin.projection import project
+from fsadmin.vectorized import estimate_many, project_many
+
+from .synthetic import fee_schedule
+
+# Projections run past the rentals, through several plan years.
+PROJECTION_MONTHS = 40
+# Mismatches printed per fee schedule.
+SHOW = 5
+
+
+def fee_schedules():
+    mixed = [dict(i, months=n) for i, n in zip(FEE_SCHEDULE, (13, 7))] + FEE_SCHEDULE[2:]
+    return {"cpap": FEE_SCHEDULE, "mixed": mixed, "large": fee_schedule("large", 12)}
+
+
+def random_patients(n, seed=0):
+    """Random parameters, including met deductibles and OOP maxes and 0% / 100% rates."""
+    rng = random.Random(seed)
+    rates = [0.0, 0.1, 0.2, 0.25, 0.3, 0.333, 0.5, 1.0]
+    out = []
+    for _ in range(n):
+        month = rng.randint(1, 12)
+        # Mostly the 1st; some mid-month and month-end starts for the projection's dates.
+        day = rng.choice([1, 1, 1, 15, calendar.monthrange(2024, month)[1]])
+        out.append(InsuranceParams(
+            eff_date=date(2024, month, day),
+            deductible_total=round(rng.uniform(0, 3000), 2),
+            deductible_met=round(rng.uniform(0, 3000), 2),
+            oop_max=round(rng.uniform(0, 8000), 2),
+            oop_met=round(rng.uniform(0, 8000), 2),
+            coinsurance_rate=rng.choice(rates + [round(rng.random(), 6)]),
+            reset_date=date(rng.choice([2023, 2024, 2025]), rng.randint(1, 12), rng.randint(1, 28)),
+        ))
+    return out
+
+
+def _mismatches(scalar, patient_cents, insurance_cents, totals):
+    # Indexes of patients whose scalar result differs from the matrix rows.
+    bad = []
+    for k, result in enumerate(scalar):
+        rows = result.schedule
+        if (
+            [r["Patient Pays"] for r in rows] != (patient_cents[k] / 100).tolist()
+            or [r["Insurance Pays"] for r in rows] != (insurance_cents[k] / 100).tolist()
+            or any(result.totals[name] != values[k] for name, values in totals.items())
+        ):
+            bad.append(k)
+    return bad
+
+
+def check(name, fees, patients):
+    fees = compile_fee_schedule(fees)
+    failures = []
+
+    matrix = estimate_many(patients, fees)
+    bad = _mismatches([estimate(p, fees) for p in patients], matrix.patient_cents,
+                      matrix.insurance_cents, matrix.totals)
+    failures += [(f"{name} schedule", patients[k]) for k in bad]
+
+    matrix = project_many(patients, fees, PROJECTION_MONTHS)
+    scalar = [project(p, fees, PROJECTION_MONTHS) for p in patients]
+    bad = _mismatches(scalar, matrix.patient_cents, matrix.insurance_cents, matrix.totals)
+    bad += [
+        k for k, result in enumerate(scalar)
+        if k not in bad
+        and [r["Plan Year"] for r in result.schedule] != matrix.plan_year[matrix.group[k]].tolist()
+    ]
+    failures += [(f"{name} projection", patients[k]) for k in bad]
+
+    status = "ok" if not failures else f"{len(failures)} MISMATCH(ES)"
+    print(f"{len(patients):>8} patients   {name:8} {status}")
+    for what, params in failures[:SHOW]:
+        print(f"    {what}: {params}", file=sys.stderr)
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the vectorized engine against the scalar one.")
+    parser.add_argument("--patients", type=int, default=3000, help="random patients per fee schedule")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    patients = random_patients(args.patients, args.seed)
+    failed = [name for name, fees in fee_schedules().items() if check(name, fees, patients)]
+    if failed:
+        print(f"\nscalar and vectorized differ on: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
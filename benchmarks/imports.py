@@ -0,0 +1,111 @@
+"""Import-time budgets, checked with ``python -X importtime``.
+
+Each entry point is imported in a fresh interpreter; the check fails if its
+cumulative import time (best of a few runs) is over budget or if it pulls in
+a module it must not load, e.g. pandas on the engine path or ReportLab before
+the first PDF.  The page is run once through Streamlit's AppTest and must not
+have imported ReportLab afterwards.
+
+    python -m benchmarks.imports          # exit 1 if a budget is blown
+"""
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGE = os.path.join(ROOT, "FSlogic_WM_fixed.py")
+RUNS = 3
+
+HEAVY = ("pandas", "numpy", "pyarrow", "reportlab", "streamlit")
+
+# module -> (budget in ms, modules it must not import)
+BUDGETS = {
+    "fsadmin.engine": (100, HEAVY),
+    "fsadmin.cli": (150, HEAVY),
+    "fsadmin.batch": (150, HEAVY),
+    "fsadmin.bulk": (200, HEAVY),
+    "fsadmin.fees": (150, HEAVY),
+    "fsadmin.pdfcache": (100, HEAVY),
+    "fsadmin.pdf": (1000, ("pandas", "numpy", "pyarrow", "streamlit")),
+}
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+PAGE_CHECK = f"""
+import sys
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({PAGE!r}, default_timeout=60)
+at.run()
+assert not at.exception, at.exception
+print(sorted({{m.split('.')[0] for m in sys.modules}} & {{'reportlab'}}))
+"""
+
+
+def import_profile(module):
+    """``(cumulative_us, imported top-level names)`` for importing ``module`` in a fresh interpreter."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    cumulative = 0
+    names = set()
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match is None:
+            continue
+        name = match.group(4)
+        names.add(name.split(".")[0])
+        # Top-level entries of our own package; interpreter startup (site etc.) is not counted.
+        if match.group(3) == " " and name.split(".")[0] == module.split(".")[0]:
+            cumulative += int(match.group(2))
+    return cumulative, names
+
+
+def check_modules():
+    failures = []
+    for module, (budget_ms, forbidden) in BUDGETS.items():
+        profiles = [import_profile(module) for _ in range(RUNS)]
+        ms = min(us for us, _ in profiles) / 1000
+        loaded = sorted(set(forbidden) & profiles[0][1])
+        status = "ok"
+        if ms > budget_ms:
+            status = f"OVER BUDGET ({budget_ms} ms)"
+        if loaded:
+            status = "imports " + ", ".join(loaded)
+        if status != "ok":
+            failures.append(module)
+        print(f"{ms:8.1f} ms   {module:20} {status}")
+    return failures
+
+
+def check_page():
+    try:
+        import streamlit  # noqa: F401
+    except ImportError:
+        print(f"{'skipped':>11}   page (streamlit not installed)")
+        return []
+    proc = subprocess.run(
+        [sys.executable, "-c", PAGE_CHECK],
+        cwd=ROOT, capture_output=True, text=True,
+        env={**os.environ, "PYTHONPATH": ROOT},
+    )
+    if proc.returncode != 0:
+        print(proc.stderr, file=sys.stderr)
+        return ["page"]
+    loaded = proc.stdout.strip().splitlines()[-1]
+    ok = loaded == "[]"
+    print(f"{'':11}   {'page first run':20} {'ok' if ok else 'imports ' + loaded}")
+    return [] if ok else ["page"]
+
+
+def main():
+    failures = check_modules() + check_page()
+    if failures:
+        print(f"\n{len(failures)} import budget(s) failed: {', '.join(failures)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
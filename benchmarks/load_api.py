@@ -0,0 +1,134 @@
+"""Load test for the HTTP API: throughput and latency under concurrent clients.
+
+Starts ``python -m fsadmin serve`` on a free local port (or targets ``--url``),
+then has ``--concurrency`` client threads, each on its own keep-alive
+connection, send ``--requests`` requests per endpoint.  Patients come from
+:func:`benchmarks.synthetic.patients`, so PDFs are mostly cache misses.
+
+    python -m benchmarks.load_api --concurrency 16 --requests 2000
+    python -m benchmarks.load_api --url http://127.0.0.1:8000 -e pdf
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from .synthetic import patients
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BATCH_SIZE = 100
+
+
+def _row(params, patient_id):
+    return {
+        "patient_id": patient_id,
+        "eff_date": params.eff_date.isoformat(),
+        "deductible_total": params.deductible_total,
+        "deductible_met": params.deductible_met,
+        "oop_max": params.oop_max,
+        "oop_met": params.oop_met,
+        "coinsurance_pct": params.coinsurance_rate * 100,
+        "reset_date": params.reset_date.isoformat(),
+    }
+
+
+def bodies(endpoint, n):
+    """``n`` request bodies for ``endpoint``."""
+    rows = [_row(p, str(k)) for k, p in enumerate(patients(max(n, BATCH_SIZE)))]
+    if endpoint == "estimate/batch":
+        return [json.dumps({"patients": rows[:BATCH_SIZE]}).encode()] * n
+    return [json.dumps(r).encode() for r in rows[:n]]
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(pdf_workers):
+    port = _free_port()
+    cmd = [sys.executable, "-m", "fsadmin", "serve", "--port", str(port)]
+    if pdf_workers:
+        cmd += ["--pdf-workers", str(pdf_workers)]
+    proc = subprocess.Popen(cmd, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return proc, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("server did not start")
+
+
+def run_load(url, endpoint, payloads, concurrency):
+    """Send every payload; returns (wall seconds, latencies, error count)."""
+    parts = urlsplit(url)
+    local = threading.local()
+    path = f"/{endpoint}"
+    headers = {"Content-Type": "application/json"}
+
+    def send(body):
+        conn = getattr(local, "conn", None)
+        if conn is None:
+            conn = local.conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=60)
+        start = time.perf_counter()
+        try:
+            conn.request("POST", path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            local.conn = None
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(send, payloads))
+    wall = time.perf_counter() - start
+    return wall, [lat for lat, _ in results], sum(1 for _, ok in results if not ok)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the FSAdmin HTTP API.")
+    parser.add_argument("--url", help="existing server to target (default: start one)")
+    parser.add_argument("-e", "--endpoint", action="append", choices=["estimate", "estimate/batch", "pdf"],
+                        help="endpoint(s) to hit (default: all)")
+    parser.add_argument("-c", "--concurrency", type=int, default=8)
+    parser.add_argument("-n", "--requests", type=int, default=500, help="requests per endpoint")
+    parser.add_argument("--pdf-workers", type=int, default=None, help="for the started server")
+    args = parser.parse_args(argv)
+
+    proc = None
+    url = args.url
+    if url is None:
+        proc, url = start_server(args.pdf_workers)
+    try:
+        print(f"{url}  concurrency={args.concurrency}  requests={args.requests}")
+        for endpoint in args.endpoint or ["estimate", "estimate/batch", "pdf"]:
+            wall, latencies, errors = run_load(url, endpoint, bodies(endpoint, args.requests), args.concurrency)
+            q = statistics.quantiles(latencies, n=100)
+            print(f"  {endpoint:15} {len(latencies) / wall:9.1f} req/s   "
+                  f"p50 {q[49] * 1000:7.1f} ms   p95 {q[94] * 1000:7.1f} ms   errors {errors}")
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""Synthetic fee schedules and patient parameter sets for the benchmarks."""
+import random
+from datetime import date
+
+from fsadmin.engine import FEE_SCHEDULE, InsuranceParams
+
+FEE_SIZES = ["small", "large"]
+
+
+def fee_schedule(size="small", months=10):
+    """``small`` is the CPAP schedule; ``large`` is 20 rentals + 200 supplies.
+
+    Every rental item runs for ``months`` months.
+    """
+    if size == "small":
+        return [dict(i, months=months) if i["type"] == "monthly" else i for i in FEE_SCHEDULE]
+    rng = random.Random(size)
+    items = [
+        {"code": f"E{n:04d}", "charge": round(rng.uniform(5, 150), 2), "type": "monthly",
+         "months": months, "desc": f"Rental {n}"}
+        for n in range(20)
+    ]
+    items += [
+        {"code": f"A{n:04d}", "charge": round(rng.uniform(1, 200), 2), "type": "one-time",
+         "desc": f"Supply {n}"}
+        for n in range(200)
+    ]
+    return items
+
+
+def patients(n, seed=0):
+    """``n`` random but reproducible InsuranceParams."""
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        ded_total = round(rng.uniform(0, 3000), 2)
+        oop_max = round(rng.uniform(1000, 8000), 2)
+        out.append(InsuranceParams(
+            eff_date=date(2024, rng.randint(1, 12), 1),
+            deductible_total=ded_total,
+            deductible_met=round(rng.uniform(0, ded_total), 2),
+            oop_max=oop_max,
+            oop_met=round(rng.uniform(0, oop_max), 2),
+            coinsurance_rate=rng.choice([0.1, 0.2, 0.3, 0.5]),
+            reset_date=date(2025, rng.randint(1, 12), 1),
+        ))
+    return out
@@ -0,0 +1,195 @@
+"""Bad inputs and edge cases that once got through, checked end to end.
+
+Each ``check_*`` function returns a list of problems (empty when it passes);
+any problem fails the run.
+
+    python -m benchmarks.validation       # exit 1 if a check fails
+"""
+import csv
+import io
+import os
+import sys
+import tempfile
+import zipfile
+from contextlib import redirect_stderr
+from datetime import date
+
+from fsadmin.batch import PARAM_COLUMNS, params_from_row
+from fsadmin.batch import main as batch_main
+from fsadmin.bulk import PdfResult, write_pdfs
+from fsadmin.engine import estimate
+from fsadmin.fees import CSV_COLUMNS, open_store
+from fsadmin.money import to_cents
+from fsadmin.projection import plan_year_starts
+from fsadmin.rules import RULES
+
+GOOD_ROW = {
+    "eff_date": "2024-01-01", "deductible_total": "350", "deductible_met": "100",
+    "oop_max": "4000", "oop_met": "912.51", "coinsurance_pct": "20", "reset_date": "2026-01-01",
+}
+# column -> values params_from_row must reject, naming the column.
+BAD_VALUES = {
+    "deductible_total": ["nan", "inf", "-1", "abc"],
+    "deductible_met": ["-0.01", "-inf"],
+    "oop_max": ["NaN", "Infinity"],
+    "oop_met": [float("nan"), -5],
+    "coinsurance_pct": ["nan", "inf", "-1", "100.5"],
+    "eff_date": ["2024-13-01"],
+}
+
+
+def _read_csv(path):
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def check_bad_values():
+    problems = []
+    for column, values in BAD_VALUES.items():
+        for value in values:
+            try:
+                params_from_row(dict(GOOD_ROW, **{column: value}))
+            except ValueError as e:
+                if not str(e).startswith(column):
+                    problems.append(f"{column}={value!r}: error doesn't name the column: {e}")
+            else:
+                problems.append(f"{column}={value!r} accepted")
+    for column, value in (("coinsurance_pct", "0"), ("coinsurance_pct", "100"), ("oop_met", "0")):
+        try:
+            params_from_row(dict(GOOD_ROW, **{column: value}))
+        except ValueError as e:
+            problems.append(f"{column}={value!r} rejected: {e}")
+    return problems
+
+
+def check_batch_bad_rows():
+    # Scalar and chunked runs skip the same bad rows and agree on the rest.
+    problems = []
+    rows = [dict(GOOD_ROW, patient_id="P1"), dict(GOOD_ROW, patient_id="NAN", coinsurance_pct="nan"),
+            dict(GOOD_ROW, patient_id="P3", oop_met="0"), dict(GOOD_ROW, patient_id="NEG", deductible_total="-1")]
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, "patients.csv")
+        with open(input_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["patient_id"] + PARAM_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+        totals = {}
+        for mode, extra in (("scalar", []), ("chunked", ["--chunk-size", "2"])):
+            out = {name: os.path.join(tmp, f"{mode}-{name}.csv") for name in ("schedules", "totals", "errors")}
+            argv = [input_path] + [a for name, path in out.items() for a in (f"--{name}", path)] + extra
+            with redirect_stderr(io.StringIO()):
+                status = batch_main(argv)
+            errors = [r["patient_id"] for r in _read_csv(out["errors"])]
+            totals[mode] = _read_csv(out["totals"])
+            if status != 1 or errors != ["NAN", "NEG"]:
+                problems.append(f"{mode}: exit {status}, bad rows {errors}")
+            if [r["patient_id"] for r in totals[mode]] != ["P1", "P3"]:
+                problems.append(f"{mode}: estimated {[r['patient_id'] for r in totals[mode]]}")
+        if totals["scalar"] != totals["chunked"]:
+            problems.append("scalar and chunked totals differ")
+    return problems
+
+
+def check_plan_years():
+    # Anniversaries before reset_date are boundaries too: the page's defaults
+    # (effective 2024-01-01, reset 2026-01-01) reset every January.
+    problems = []
+    cases = [
+        ((date(2024, 1, 1), date(2026, 1, 1), 40), [13, 25, 37]),
+        ((date(2024, 3, 15), date(2023, 7, 1), 30), [5, 17, 29]),
+        ((date(2024, 1, 1), date(2024, 1, 1), 14), [13]),
+    ]
+    for args, expected in cases:
+        starts = plan_year_starts(*args)
+        if starts != expected:
+            problems.append(f"plan_year_starts{args}: {starts}, expected {expected}")
+    return problems
+
+
+def check_upfront_totals():
+    # The upfront total is what the rule bills (rental caps, rate steps), i.e. patient + insurance.
+    problems = []
+    params = params_from_row(GOOD_ROW)
+    for name, rule in RULES.items():
+        totals = estimate(params, rule=rule).totals
+        billed = to_cents(totals["estimated_patient"]) + to_cents(totals["estimated_insurance"])
+        if to_cents(totals["total_all_upfront"]) != billed:
+            problems.append(f"{name}: upfront {totals['total_all_upfront']}, billed {billed / 100}")
+    return problems
+
+
+def check_pdf_filenames():
+    # Repeated IDs, IDs that sanitize alike and case-only differences each get their own file.
+    problems = []
+    ids = ["a/b", "a_b", "a_b", "A_B", "a_b-2", "..."]
+    results = [PdfResult(patient_id, patient_id.encode()) for patient_id in ids]
+    with tempfile.TemporaryDirectory() as tmp:
+        for out in (os.path.join(tmp, "eobs.zip"), os.path.join(tmp, "eobs")):
+            write_pdfs(results, out)
+            if out.endswith(".zip"):
+                with zipfile.ZipFile(out) as archive:
+                    contents = sorted(archive.read(name).decode() for name in archive.namelist())
+            else:
+                contents = []
+                for name in os.listdir(out):
+                    with open(os.path.join(out, name), "rb") as f:
+                        contents.append(f.read().decode())
+                contents.sort()
+            if contents != sorted(ids):
+                problems.append(f"{os.path.basename(out)}: {contents}")
+    return problems
+
+
+def check_fee_import():
+    # A monthly code without months (or a bad charge) rejects the whole import, naming the row.
+    problems = []
+    good = {"payer": "ACME", "code": "E0601", "charge": "70", "type": "monthly", "months": "13",
+            "desc": "Rental", "effective_from": "2024-01-01", "effective_to": ""}
+    bad_rows = [{"months": ""}, {"months": "0"}, {"charge": "nan"}, {"charge": "-1"}, {"type": "rental"}]
+    with tempfile.TemporaryDirectory() as tmp:
+        store = open_store(os.path.join(tmp, "fees.db"))
+        try:
+            version = store.version
+            for bad in bad_rows:
+                path = os.path.join(tmp, "fees.csv")
+                with open(path, "w", newline="") as f:
+                    writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+                    writer.writeheader()
+                    writer.writerows([good, dict(good, code="E0562", **bad)])
+                try:
+                    store.import_csv(path)
+                except ValueError as e:
+                    if "row 2" not in str(e):
+                        problems.append(f"{bad}: error doesn't name row 2: {e}")
+                else:
+                    problems.append(f"{bad} imported")
+            if store.version != version or "ACME" in store.payers():
+                problems.append("a rejected import was written")
+        finally:
+            store.close()
+    return problems
+
+
+CHECKS = [
+    check_bad_values, check_batch_bad_rows, check_plan_years, check_upfront_totals, check_pdf_filenames,
+    check_fee_import,
+]
+
+
+def main():
+    failed = []
+    for check in CHECKS:
+        problems = check()
+        print(f"{check.__name__:28} {'ok' if not problems else 'FAILED'}")
+        for problem in problems:
+            print(f"    {problem}", file=sys.stderr)
+        if problems:
+            failed.append(check.__name__)
+    if failed:
+        print(f"\n{len(failed)} check(s) failed: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
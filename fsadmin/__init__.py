@@ -0,0 +1,30 @@
+"""FSAdmin CPAP EOB estimator."""
+from .engine import (
+    FEE_SCHEDULE,
+    CompiledFeeSchedule,
+    Estimate,
+    InsuranceParams,
+    RentalLines,
+    build_schedule,
+    build_setup_lines,
+    compile_fee_schedule,
+    compute_totals,
+    estimate,
+    fee_schedule_key,
+    normalize_params,
+)
+
+__all__ = [
+    "FEE_SCHEDULE",
+    "CompiledFeeSchedule",
+    "Estimate",
+    "InsuranceParams",
+    "RentalLines",
+    "build_schedule",
+    "build_setup_lines",
+    "compile_fee_schedule",
+    "compute_totals",
+    "estimate",
+    "fee_schedule_key",
+    "normalize_params",
+]
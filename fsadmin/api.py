@@ -0,0 +1,276 @@
+"""HTTP JSON API around the estimate engine and the PDF renderer (Starlette/ASGI).
+
+    POST /estimate        one patient   -> {"setup", "schedule", "totals"}
+    POST /estimate/batch  {"patients": [...]} -> {"results": [...]}
+    POST /pdf             one patient   -> application/pdf, streamed
+    GET  /health
+    GET  /metrics         Prometheus text (see fsadmin.metrics)
+
+Patients use the batch column names (``eff_date``, ``deductible_total``, ...,
+``coinsurance_pct`` in percent); ``/pdf`` also takes an optional ``date`` for the
+statement.  With ``FSADMIN_FEE_DB`` set, an optional ``payer`` prices the CPAP
+package from the fee store, as in the page.  The payer also picks the payer
+rule (:func:`fsadmin.rules.rule_for`) unless ``rule`` names one.
+
+Estimates are cheap and run on the event loop (batches in a thread), unless
+they may read a store (see below); PDFs are
+built in a process pool so ``doc.build`` never blocks the loop, and repeat
+requests are served from :data:`fsadmin.pdfcache.pdf_cache`.  With
+``FSADMIN_ESTIMATE_DB`` set, estimates and PDFs are also kept in a persistent
+:class:`fsadmin.estimates.EstimateStore` shared with other processes; its
+counters are in ``/health``.  Both stores are SQLite (and the fee store's
+lock may be held by a batch), so any request that can touch one runs in the
+threadpool, never on the loop.  Estimate and PDF counts, latencies, failures
+and cache lookups are in ``/metrics``.
+
+    uvicorn fsadmin.api:app --port 8000
+    python -m fsadmin serve --port 8000 --pdf-workers 4
+"""
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import date
+
+try:
+    from starlette.applications import Starlette
+    from starlette.concurrency import run_in_threadpool
+    from starlette.responses import JSONResponse, Response, StreamingResponse
+    from starlette.routing import Route
+except ImportError:
+    raise ImportError("The API service needs starlette (and uvicorn to run it): pip install starlette uvicorn") from None
+
+from .batch import params_from_row
+from .engine import FEE_SCHEDULE, estimate
+from .estimates import open_estimate_store
+from .metrics import CONTENT_TYPE, ESTIMATES, PDFS, REGISTRY, cache_lookup
+from .pdfcache import pdf_cache, pdf_key
+from .rules import get_rule, rule_for
+
+# Patients accepted by one /estimate/batch request.
+MAX_BATCH = 10_000
+# Size of the chunks a PDF response is streamed in.
+PDF_CHUNK_BYTES = 64 * 1024
+
+
+class _BadRequest(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# --- PDF Worker Pool ---
+def _warm_worker():
+    from .pdf import get_assets
+
+    get_assets()
+
+
+def _render_pdf(setup, schedule, totals, report_date):
+    from .pdf import render_pdf
+
+    return render_pdf(setup, schedule, totals, report_date)
+
+
+# --- Request Handling ---
+async def _json_body(request):
+    try:
+        body = await request.json()
+    except ValueError:
+        raise _BadRequest(400, "body must be JSON")
+    if not isinstance(body, dict):
+        raise _BadRequest(400, "body must be a JSON object")
+    return body
+
+
+def _fee_schedule(request, row, as_of):
+    store = request.app.state.fee_store
+    if store is None:
+        return FEE_SCHEDULE
+    from .fees import DEFAULT_PAYER
+
+    payer = row.get("payer") or DEFAULT_PAYER
+    if payer not in store.payers():
+        raise _BadRequest(422, f"unknown payer {payer!r}")
+    return store.package(payer, as_of)
+
+
+def _rule(row):
+    if not row.get("rule"):
+        return rule_for(row.get("payer"))
+    try:
+        return get_rule(row["rule"])
+    except KeyError as e:
+        raise _BadRequest(422, e.args[0])
+
+
+def _estimate_row(request, row, item_lines=False):
+    for name in ("payer", "rule"):
+        if row.get(name) is not None and not isinstance(row[name], str):
+            raise _BadRequest(422, f"{name} must be a string")
+    try:
+        params = params_from_row(row)
+    except ValueError as e:
+        raise _BadRequest(422, str(e))
+    fee_schedule = _fee_schedule(request, row, params.eff_date)
+    estimates = request.app.state.estimates
+    compute = estimate if estimates is None else estimates.estimate
+    rule = _rule(row)
+    with ESTIMATES.track():
+        return compute(params, fee_schedule, item_lines=item_lines, rule=rule)
+
+
+async def _estimate(request, row, item_lines=False):
+    # Off the loop when it may read the fee store or read/write the estimate store.
+    state = request.app.state
+    if state.estimates is None and state.fee_store is None:
+        return _estimate_row(request, row, item_lines)
+    return await run_in_threadpool(_estimate_row, request, row, item_lines)
+
+
+def _estimate_json(result):
+    out = {"setup": result.setup, "schedule": result.schedule, "totals": result.totals}
+    if result.lines is not None:
+        out["lines"] = result.lines.rows()
+    return out
+
+
+def _handle_errors(endpoint):
+    async def wrapper(request):
+        try:
+            return await endpoint(request)
+        except _BadRequest as e:
+            return JSONResponse({"error": str(e)}, status_code=e.status)
+    wrapper.__name__ = endpoint.__name__
+    return wrapper
+
+
+@_handle_errors
+async def post_estimate(request):
+    row = await _json_body(request)
+    return JSONResponse(_estimate_json(await _estimate(request, row, item_lines=bool(row.get("lines")))))
+
+
+@_handle_errors
+async def post_estimate_batch(request):
+    body = await _json_body(request)
+    patients = body.get("patients")
+    if not isinstance(patients, list):
+        raise _BadRequest(400, '"patients" must be a list')
+    if len(patients) > MAX_BATCH:
+        raise _BadRequest(413, f"at most {MAX_BATCH} patients per request")
+
+    def run():
+        results = []
+        for n, row in enumerate(patients, start=1):
+            patient_id = str(row.get("patient_id") or n) if isinstance(row, dict) else str(n)
+            try:
+                if not isinstance(row, dict):
+                    raise _BadRequest(422, "patient must be a JSON object")
+                result = _estimate_row(request, row)
+            except _BadRequest as e:
+                results.append({"patient_id": patient_id, "error": str(e)})
+                continue
+            results.append({"patient_id": patient_id, "schedule": result.schedule, "totals": result.totals})
+        return results
+
+    return JSONResponse({"results": await run_in_threadpool(run)})
+
+
+@_handle_errors
+async def post_pdf(request):
+    row = await _json_body(request)
+    try:
+        report_date = date.fromisoformat(row["date"]) if row.get("date") else date.today()
+    except (TypeError, ValueError):
+        raise _BadRequest(422, f"bad date {row.get('date')!r}")
+    result = await _estimate(request, row)
+    key = pdf_key(result.setup, result.schedule, result.totals, report_date)
+    estimates = request.app.state.estimates
+    pdf = pdf_cache.get(key)
+    cache_lookup("pdf_memory", pdf is not None)
+    if pdf is None and estimates is not None:
+        pdf = await run_in_threadpool(estimates.get_pdf, key)
+    if pdf is None:
+        loop = asyncio.get_running_loop()
+        with PDFS.track():
+            pdf = await loop.run_in_executor(
+                request.app.state.pdf_pool, _render_pdf,
+                result.setup, result.schedule, result.totals, report_date,
+            )
+        if estimates is not None:
+            await run_in_threadpool(estimates.put_pdf, key, pdf)
+    pdf_cache.put(key, pdf)
+
+    def chunks():
+        for start in range(0, len(pdf), PDF_CHUNK_BYTES):
+            yield pdf[start:start + PDF_CHUNK_BYTES]
+
+    return StreamingResponse(
+        chunks(),
+        media_type="application/pdf",
+        headers={
+            "Content-Length": str(len(pdf)),
+            "Content-Disposition": 'attachment; filename="cpap_eob.pdf"',
+        },
+    )
+
+
+async def get_health(request):
+    health = {"status": "ok"}
+    estimates = request.app.state.estimates
+    if estimates is not None:
+        health["estimate_store"] = await run_in_threadpool(estimates.stats)
+    return JSONResponse(health)
+
+
+async def get_metrics(request):
+    return Response(REGISTRY.to_prometheus(), media_type=CONTENT_TYPE)
+
+
+# --- App ---
+def create_app(fee_db=None, pdf_workers=None, estimate_db=None):
+    """The ASGI app.
+
+    ``fee_db`` defaults to ``$FSADMIN_FEE_DB``, ``estimate_db`` to
+    ``$FSADMIN_ESTIMATE_DB`` and ``pdf_workers`` to the CPU count.
+    """
+    fee_db = fee_db or os.environ.get("FSADMIN_FEE_DB")
+    pdf_workers = pdf_workers or int(os.environ.get("FSADMIN_PDF_WORKERS", 0)) or os.cpu_count() or 1
+
+    @asynccontextmanager
+    async def lifespan(app):
+        store = None
+        if fee_db:
+            from .fees import open_store
+
+            store = open_store(fee_db)
+        estimates = open_estimate_store(estimate_db)
+        pool = ProcessPoolExecutor(max_workers=pdf_workers)
+        for _ in range(pdf_workers):
+            pool.submit(_warm_worker)
+        app.state.fee_store = store
+        app.state.estimates = estimates
+        app.state.pdf_pool = pool
+        try:
+            yield
+        finally:
+            pool.shutdown(cancel_futures=True)
+            if store is not None:
+                store.close()
+            if estimates is not None:
+                estimates.close()
+
+    return Starlette(
+        routes=[
+            Route("/estimate", post_estimate, methods=["POST"]),
+            Route("/estimate/batch", post_estimate_batch, methods=["POST"]),
+            Route("/pdf", post_pdf, methods=["POST"]),
+            Route("/health", get_health, methods=["GET"]),
+            Route("/metrics", get_metrics, methods=["GET"]),
+        ],
+        lifespan=lifespan,
+    )
+
+
+app = create_app()
@@ -0,0 +1,325 @@
+"""Batch EOB estimation from a CSV/Parquet file of patient insurance parameters.
+
+Input columns mirror the sidebar::
+
+    patient_id, eff_date, deductible_total, deductible_met,
+    oop_max, oop_met, coinsurance_pct, reset_date
+
+``coinsurance_pct`` is a percentage like the sidebar field (20 == 20%), dates
+are ISO ``YYYY-MM-DD`` and ``patient_id`` is optional (the 1-based row number is
+used when it is missing).  Rows are read, estimated and written one at a time,
+so memory stays flat no matter how large the file is.  A row that doesn't
+parse is skipped and reported (to ``--errors`` if given, else stderr); the
+rest of the file is still estimated and the exit status is 1.
+
+    python -m fsadmin.batch patients.csv --schedules schedules.csv --totals totals.csv --errors errors.csv
+"""
+import argparse
+import calendar
+import csv
+import math
+import os
+import sys
+from datetime import date
+
+from .engine import FEE_SCHEDULE, InsuranceParams, compile_fee_schedule, estimate
+
+PARAM_COLUMNS = [
+    "eff_date", "deductible_total", "deductible_met",
+    "oop_max", "oop_met", "coinsurance_pct", "reset_date",
+]
+SCHEDULE_COLUMNS = ["patient_id", "month", "Month", "Patient Pays", "Insurance Pays"]
+TOTALS_COLUMNS = [
+    "patient_id", "setup_total", "estimated_patient", "estimated_insurance",
+    "supply_total", "monthly_total", "max_months", "total_all_upfront",
+]
+# With ``months`` set (multi-year projection on real dates).
+PROJECTION_COLUMNS = ["patient_id", "month", "Date", "Month", "Plan Year", "Patient Pays", "Insurance Pays"]
+PROJECTION_TOTALS_COLUMNS = TOTALS_COLUMNS + ["months", "plan_years"]
+ERROR_COLUMNS = ["patient_id", "row", "error"]
+
+PARQUET_BATCH_ROWS = 10_000
+
+
+def _is_parquet(path):
+    return os.path.splitext(path)[1].lower() in (".parquet", ".pq")
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet files need pyarrow: pip install pyarrow") from None
+    return pyarrow
+
+
+def _as_date(value):
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value).strip())
+
+
+def _column(row, name, convert, valid=None, expected=None):
+    value = row[name]
+    try:
+        converted = convert(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name}: bad value {value!r}") from None
+    if valid is not None and not valid(converted):
+        raise ValueError(f"{name}: {value!r} is not {expected}")
+    return converted
+
+
+def _amount(row, name):
+    # NaN fails the comparison too.
+    return _column(row, name, float, lambda x: 0 <= x < math.inf, "an amount >= 0")
+
+
+def params_from_row(row):
+    """Turn one input record (a dict of column -> value) into an InsuranceParams.
+
+    Raises ValueError naming the column for a missing or malformed value, or
+    one outside the sidebar's limits: amounts finite and >= 0, coinsurance
+    0-100.
+    """
+    missing = [c for c in PARAM_COLUMNS if row.get(c) in (None, "")]
+    if missing:
+        raise ValueError(f"missing column(s): {', '.join(missing)}")
+    coinsurance_pct = _column(
+        row, "coinsurance_pct", float, lambda x: 0 <= x <= 100, "a percentage from 0 to 100"
+    )
+    return InsuranceParams(
+        eff_date=_column(row, "eff_date", _as_date),
+        deductible_total=_amount(row, "deductible_total"),
+        deductible_met=_amount(row, "deductible_met"),
+        oop_max=_amount(row, "oop_max"),
+        oop_met=_amount(row, "oop_met"),
+        coinsurance_rate=coinsurance_pct / 100.0,
+        reset_date=_column(row, "reset_date", _as_date),
+    )
+
+
+def iter_rows(path):
+    """Yield input records as dicts, streaming from CSV or Parquet."""
+    if _is_parquet(path):
+        pyarrow = _import_pyarrow()
+        pf = pyarrow.parquet.ParquetFile(path)
+        for batch in pf.iter_batches(batch_size=PARQUET_BATCH_ROWS):
+            yield from batch.to_pylist()
+    else:
+        with open(path, newline="") as f:
+            yield from csv.DictReader(f)
+
+
+def iter_params(path, on_error=None):
+    """Yield ``(patient_id, InsuranceParams)`` for every row of ``path``.
+
+    A row that doesn't parse raises ValueError, or with ``on_error`` set is
+    skipped after calling ``on_error(patient_id, row_number, message)``.
+    """
+    for n, row in enumerate(iter_rows(path), start=1):
+        patient_id = row.get("patient_id")
+        patient_id = str(patient_id) if patient_id not in (None, "") else str(n)
+        try:
+            params = params_from_row(row)
+        except ValueError as e:
+            if on_error is None:
+                raise ValueError(f"{path}, row {n}: {e}") from None
+            on_error(patient_id, n, str(e))
+            continue
+        yield patient_id, params
+
+
+class _CsvWriter:
+    def __init__(self, path, columns):
+        self._f = open(path, "w", newline="")
+        self._w = csv.DictWriter(self._f, fieldnames=columns)
+        self._w.writeheader()
+
+    def write(self, row):
+        self._w.writerow(row)
+
+    def close(self):
+        self._f.close()
+
+
+class _ParquetWriter:
+    """Buffers up to PARQUET_BATCH_ROWS rows and flushes them as one row group."""
+
+    def __init__(self, path, columns):
+        self._pa = _import_pyarrow()
+        self._path = path
+        self._columns = columns
+        self._rows = []
+        self._writer = None
+
+    def write(self, row):
+        self._rows.append(row)
+        if len(self._rows) >= PARQUET_BATCH_ROWS:
+            self._flush()
+
+    def _flush(self):
+        if not self._rows:
+            return
+        table = self._pa.Table.from_pylist(self._rows)
+        if self._writer is None:
+            self._writer = self._pa.parquet.ParquetWriter(self._path, table.schema)
+        self._writer.write_table(table)
+        self._rows = []
+
+    def close(self):
+        self._flush()
+        if self._writer is not None:
+            self._writer.close()
+
+
+def open_writer(path, columns):
+    return (_ParquetWriter if _is_parquet(path) else _CsvWriter)(path, columns)
+
+
+def _cents(totals):
+    return {k: round(v, 2) if isinstance(v, float) else v for k, v in totals.items()}
+
+
+def _chunks(patients, size):
+    chunk = []
+    for item in patients:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _write_matrix(chunk, schedules, totals, fee_schedule):
+    from .vectorized import estimate_many
+
+    result = estimate_many([params for _, params in chunk], fee_schedule)
+    months = result.months.tolist()
+    month_index = result.month_index.tolist()
+    pat = result.patient_pays.tolist()
+    ins = result.insurance_pays.tolist()
+    chunk_totals = {k: v.tolist() for k, v in result.totals.items()}
+    for k, (patient_id, _) in enumerate(chunk):
+        for j, m in enumerate(months):
+            schedules.write({
+                "patient_id": patient_id,
+                "month": m,
+                "Month": calendar.month_name[month_index[k][j]],
+                "Patient Pays": pat[k][j],
+                "Insurance Pays": ins[k][j],
+            })
+        totals.write({"patient_id": patient_id, **_cents({name: v[k] for name, v in chunk_totals.items()})})
+
+
+def _write_projection_matrix(chunk, schedules, totals, fee_schedule, months):
+    from .projection import month_label
+    from .vectorized import project_many
+
+    result = project_many([params for _, params in chunk], fee_schedule, months)
+    month_numbers = result.months.tolist()
+    labels = [[(d.isoformat(), month_label(d)) for d in dates] for dates in result.dates]
+    plan_year = result.plan_year.tolist()
+    group = result.group.tolist()
+    pat = result.patient_pays.tolist()
+    ins = result.insurance_pays.tolist()
+    chunk_totals = {k: v.tolist() for k, v in result.totals.items()}
+    for k, (patient_id, _) in enumerate(chunk):
+        g = group[k]
+        for j, m in enumerate(month_numbers):
+            schedules.write({
+                "patient_id": patient_id,
+                "month": m,
+                "Date": labels[g][j][0],
+                "Month": labels[g][j][1],
+                "Plan Year": plan_year[g][j],
+                "Patient Pays": pat[k][j],
+                "Insurance Pays": ins[k][j],
+            })
+        totals.write({"patient_id": patient_id, **_cents({name: v[k] for name, v in chunk_totals.items()})})
+
+
+def run_batch(patients, schedules_path, totals_path, fee_schedule=FEE_SCHEDULE, chunk_size=None, months=None):
+    """Estimate every ``(patient_id, params)`` in ``patients`` and stream the results out.
+
+    Schedules are written long-form (one row per patient per rental month,
+    ``month`` counting from 2 like the page); totals get one row per patient.
+    With ``chunk_size`` set, patients are estimated ``chunk_size`` at a time
+    with the vectorized engine (same numbers, needs NumPy).  With ``months``
+    set, each patient is projected over that many months on real dates (see
+    :mod:`fsadmin.projection`) and the schedule rows also carry the billing
+    date and plan year.
+    Returns the number of patients processed.
+    """
+    fee_schedule = compile_fee_schedule(fee_schedule)
+    schedules = open_writer(schedules_path, PROJECTION_COLUMNS if months else SCHEDULE_COLUMNS)
+    totals = open_writer(totals_path, PROJECTION_TOTALS_COLUMNS if months else TOTALS_COLUMNS)
+    count = 0
+    try:
+        if chunk_size:
+            for chunk in _chunks(patients, chunk_size):
+                if months:
+                    _write_projection_matrix(chunk, schedules, totals, fee_schedule, months)
+                else:
+                    _write_matrix(chunk, schedules, totals, fee_schedule)
+                count += len(chunk)
+        elif months:
+            from .projection import project
+
+            for patient_id, params in patients:
+                result = project(params, fee_schedule, months)
+                for m, line in enumerate(result.schedule, start=2):
+                    schedules.write({"patient_id": patient_id, "month": m, **line})
+                totals.write({"patient_id": patient_id, **_cents(result.totals)})
+                count += 1
+        else:
+            for patient_id, params in patients:
+                result = estimate(params, fee_schedule)
+                for m, line in enumerate(result.schedule, start=2):
+                    schedules.write({"patient_id": patient_id, "month": m, **line})
+                totals.write({"patient_id": patient_id, **_cents(result.totals)})
+                count += 1
+    finally:
+        schedules.close()
+        totals.close()
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch CPAP EOB estimates.")
+    parser.add_argument("input", help="CSV or Parquet file of patient insurance parameters")
+    parser.add_argument("--schedules", required=True, help="output file for per-patient schedules (.csv/.parquet)")
+    parser.add_argument("--totals", required=True, help="output file for per-patient totals (.csv/.parquet)")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="estimate this many patients at a time with the vectorized engine")
+    parser.add_argument("--months", type=int, default=None,
+                        help="project this many months on real dates, resetting every plan year")
+    parser.add_argument("--errors", default=None,
+                        help="output file for rows that don't parse (.csv/.parquet; default: stderr)")
+    args = parser.parse_args(argv)
+
+    errors = open_writer(args.errors, ERROR_COLUMNS) if args.errors else None
+    bad = 0
+
+    def on_error(patient_id, n, message):
+        nonlocal bad
+        bad += 1
+        if errors is not None:
+            errors.write({"patient_id": patient_id, "row": n, "error": message})
+        else:
+            print(f"{args.input}, row {n} ({patient_id}): {message}", file=sys.stderr)
+
+    try:
+        count = run_batch(iter_params(args.input, on_error), args.schedules, args.totals,
+                          chunk_size=args.chunk_size, months=args.months)
+    finally:
+        if errors is not None:
+            errors.close()
+    print(f"{count} patient(s) estimated, {bad} bad row(s) skipped", file=sys.stderr)
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""Bulk EOB PDF generation across a process pool.
+
+One PDF per patient, same layout as the page's "Generate PDF Report", written
+to a directory or a single ZIP, named after the patient ID (``-2``, ``-3``...
+added when IDs repeat or sanitize to the same name).  ``doc.build`` is CPU-bound, so patients are
+spread over a ``ProcessPoolExecutor`` (or an executor the caller passes in,
+e.g. the page's thread pool, where forking isn't safe); failures are captured
+per patient and don't stop the run.
+
+    python -m fsadmin.bulk patients.csv --out eobs.zip --workers 8
+"""
+import argparse
+import os
+import re
+import sys
+import traceback
+import zipfile
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import date
+
+from .batch import iter_rows, params_from_row
+from .engine import FEE_SCHEDULE, compile_fee_schedule, estimate
+
+# Jobs kept in flight per worker; bounds memory when the input is large.
+IN_FLIGHT_PER_WORKER = 4
+
+
+@dataclass(frozen=True)
+class PdfResult:
+    patient_id: str
+    pdf: bytes        # None when rendering failed
+    error: str = None
+    filename: str = None   # set by iter_pdfs; unique within the run
+
+
+def render_patient_pdf(params, report_date, fee_schedule=FEE_SCHEDULE):
+    """Estimate one patient and render their statement."""
+    from .pdf import render_pdf
+
+    result = estimate(params, fee_schedule)
+    return render_pdf(result.setup, result.schedule, result.totals, report_date)
+
+
+def _render_job(patient_id, params, report_date, fee_schedule, filename):
+    try:
+        return PdfResult(patient_id, render_patient_pdf(params, report_date, fee_schedule), filename=filename)
+    except Exception:
+        return PdfResult(patient_id, None, traceback.format_exc(limit=3).strip(), filename)
+
+
+def iter_patients(path):
+    """``(patient_id, params_or_error)`` for every row of ``path``; bad rows yield the error text."""
+    for n, row in enumerate(iter_rows(path), start=1):
+        patient_id = row.get("patient_id")
+        patient_id = str(patient_id) if patient_id not in (None, "") else str(n)
+        try:
+            yield patient_id, params_from_row(row)
+        except ValueError as e:
+            yield patient_id, f"row {n}: {e}"
+
+
+def iter_pdfs(patients, workers=None, report_date=None, fee_schedule=FEE_SCHEDULE, executor=None):
+    """Render ``(patient_id, params)`` pairs in a process pool, yielding PdfResults as they finish.
+
+    At most ``workers * IN_FLIGHT_PER_WORKER`` PDFs are pending at once, so
+    memory doesn't grow with the size of ``patients``.  A string in place of
+    params is passed through as that patient's error.  With ``executor``, the
+    PDFs are rendered there instead and it is left running afterwards.  File
+    names are given out in input order, so a repeated ID gets the same
+    ``-2`` suffix however the PDFs finish.
+    """
+    report_date = report_date or date.today()
+    fee_schedule = compile_fee_schedule(fee_schedule)
+    workers = workers or os.cpu_count() or 1
+    limit = workers * IN_FLIGHT_PER_WORKER
+    pending = set()
+    used = set()
+    with nullcontext(executor) if executor is not None else ProcessPoolExecutor(max_workers=workers) as pool:
+        for patient_id, params in patients:
+            if isinstance(params, str):
+                yield PdfResult(patient_id, None, params)
+                continue
+            filename = unique_filename(pdf_filename(patient_id), used)
+            pending.add(pool.submit(_render_job, patient_id, params, report_date, fee_schedule, filename))
+            if len(pending) >= limit:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in wait(pending).done:
+            yield future.result()
+
+
+def pdf_filename(patient_id):
+    return (re.sub(r"[^A-Za-z0-9._-]+", "_", patient_id).strip("._") or "patient") + ".pdf"
+
+
+def unique_filename(name, used):
+    """``name``, or ``name-2.pdf``, ``name-3.pdf``... if ``used`` has it; adds the result to ``used``.
+
+    Compared case-insensitively, as on Windows and macOS file systems.
+    """
+    stem = name[:-len(".pdf")]
+    n = 1
+    while name.lower() in used:
+        n += 1
+        name = f"{stem}-{n}.pdf"
+    used.add(name.lower())
+    return name
+
+
+def write_pdfs(results, out, progress=None):
+    """Write successful results to ``out`` (a directory, or a ``.zip`` file).
+
+    PDFs are written as they arrive, as ``result.filename`` (default: from the
+    patient ID), never overwriting one written earlier in the run.
+    ``progress(done, failed)`` is called after each result.  Returns the
+    failed PdfResults.
+    """
+    is_zip = out.lower().endswith(".zip")
+    if is_zip:
+        archive = zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED)
+    else:
+        os.makedirs(out, exist_ok=True)
+    failed = []
+    used = set()
+    done = 0
+    try:
+        for result in results:
+            done += 1
+            if result.error is not None:
+                failed.append(result)
+            else:
+                filename = unique_filename(result.filename or pdf_filename(result.patient_id), used)
+                if is_zip:
+                    archive.writestr(filename, result.pdf)
+                else:
+                    with open(os.path.join(out, filename), "wb") as f:
+                        f.write(result.pdf)
+            if progress is not None:
+                progress(done, len(failed))
+    finally:
+        if is_zip:
+            archive.close()
+    return failed
+
+
+def render_pdfs(patients, out, workers=None, progress=None, report_date=None, fee_schedule=FEE_SCHEDULE,
+                executor=None):
+    """Render one PDF per ``(patient_id, params)`` into ``out``; returns the failed PdfResults."""
+    results = iter_pdfs(patients, workers=workers, report_date=report_date, fee_schedule=fee_schedule,
+                        executor=executor)
+    return write_pdfs(results, out, progress=progress)
+
+
+def _print_progress(done, failed):
+    if done % 50 == 0:
+        print(f"\r{done} rendered, {failed} failed", end="", file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render one CPAP EOB PDF per patient.")
+    parser.add_argument("input", help="CSV or Parquet file of patient insurance parameters")
+    parser.add_argument("--out", required=True, help="output directory, or a .zip file")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    failed = render_pdfs(iter_patients(args.input), args.out, workers=args.workers, progress=_print_progress)
+    print(file=sys.stderr)
+    for result in failed:
+        print(f"{result.patient_id}: {result.error}", file=sys.stderr)
+    print(f"{len(failed)} failure(s)", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
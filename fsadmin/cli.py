@@ -0,0 +1,224 @@
+"""Headless entry point: ``python -m fsadmin {estimate,pdf,batch,bulk,serve}``.
+
+Only the engine is imported up front; ReportLab is loaded by ``pdf``/``bulk``
+and the batch modules by their own commands, so a single estimate starts in a
+fraction of a second without Streamlit or pandas.
+
+Parameters use the batch column names and can come from flags, a JSON object
+(``--json FILE``, ``-`` for stdin) or both, flags winning::
+
+    python -m fsadmin estimate --eff-date 2024-01-01 --deductible-total 350 \\
+        --deductible-met 350 --oop-max 4000 --oop-met 912.51 \\
+        --coinsurance-pct 20 --reset-date 2026-01-01
+    echo '{"eff_date": "2024-01-01", ...}' | python -m fsadmin pdf --json - -o eob.pdf
+    python -m fsadmin batch patients.csv --schedules s.csv --totals t.csv
+    python -m fsadmin bulk patients.csv --out eobs.zip
+    python -m fsadmin serve --port 8000
+"""
+import argparse
+import json
+import sys
+from datetime import date
+
+from .engine import FEE_SCHEDULE, estimate
+from .rules import RULES, get_rule, rule_for
+
+PARAM_FLAGS = [
+    ("eff_date", "insurance effective date, YYYY-MM-DD"),
+    ("deductible_total", "deductible total"),
+    ("deductible_met", "deductible already met"),
+    ("oop_max", "out-of-pocket max"),
+    ("oop_met", "OOP max already met"),
+    ("coinsurance_pct", "coinsurance rate in percent (20 == 20%%)"),
+    ("reset_date", "deductible reset date, YYYY-MM-DD"),
+]
+
+
+def _add_param_args(parser):
+    group = parser.add_argument_group("insurance parameters")
+    group.add_argument("--json", metavar="FILE", help="JSON object with the parameters ('-' for stdin)")
+    for name, help in PARAM_FLAGS:
+        group.add_argument("--" + name.replace("_", "-"), dest=name, help=help)
+    fees = parser.add_argument_group("fee schedule")
+    fees.add_argument("--fee-db", help="price the CPAP package from this fee store instead of the built-in schedule")
+    fees.add_argument("--payer", default=None, help="payer in --fee-db (default: DEFAULT)")
+    fees.add_argument("--rule", choices=sorted(RULES), default=None,
+                      help="payer rule (default: the payer's registered rule, else commercial_coinsurance)")
+    parser.add_argument("--estimate-db", default=None,
+                        help="reuse and save results in this estimate store (default: $FSADMIN_ESTIMATE_DB)")
+
+
+def _read_params(args):
+    from .batch import params_from_row
+
+    row = {}
+    if args.json:
+        if args.json == "-":
+            row = json.load(sys.stdin)
+        else:
+            with open(args.json) as f:
+                row = json.load(f)
+        if not isinstance(row, dict):
+            raise SystemExit("error: --json must hold a single JSON object")
+    for name, _ in PARAM_FLAGS:
+        value = getattr(args, name)
+        if value is not None:
+            row[name] = value
+    try:
+        return params_from_row(row)
+    except ValueError as e:
+        raise SystemExit(f"error: {e} (use --{PARAM_FLAGS[0][0].replace('_', '-')} etc. or --json)")
+
+
+def _fee_schedule(args, as_of):
+    if not args.fee_db:
+        return FEE_SCHEDULE
+    from .fees import DEFAULT_PAYER, open_store
+
+    return open_store(args.fee_db).package(args.payer or DEFAULT_PAYER, as_of)
+
+
+def _rule(args):
+    return get_rule(args.rule) if args.rule else rule_for(args.payer)
+
+
+def _estimate(args, params, fee_schedule, item_lines=False):
+    from .estimates import open_estimate_store
+
+    store = open_estimate_store(args.estimate_db)
+    if store is None:
+        return estimate(params, fee_schedule, item_lines=item_lines, rule=_rule(args))
+    try:
+        return store.estimate(params, fee_schedule, item_lines=item_lines, rule=_rule(args))
+    finally:
+        store.close()
+
+
+def cmd_estimate(args):
+    params = _read_params(args)
+    fee_schedule = _fee_schedule(args, params.eff_date)
+    if args.resupply:
+        from .resupply import project_claims
+
+        result = project_claims(params, fee_schedule, args.months, rule=_rule(args))
+        out = {"setup": result.setup, "claims": result.claims, "totals": result.totals}
+    elif args.months:
+        from .projection import project
+
+        result = project(params, fee_schedule, args.months, rule=_rule(args))
+        out = {"setup": result.setup, "schedule": result.schedule, "totals": result.totals}
+    else:
+        result = _estimate(args, params, fee_schedule, item_lines=args.lines)
+        out = {"setup": result.setup, "schedule": result.schedule, "totals": result.totals}
+        if args.lines:
+            out["lines"] = result.lines.rows()
+    json.dump(out, sys.stdout, indent=args.indent)
+    sys.stdout.write("\n")
+    return 0
+
+
+def cmd_pdf(args):
+    from .estimates import open_estimate_store
+    from .pdfcache import render_pdf_cached
+
+    params = _read_params(args)
+    store = open_estimate_store(args.estimate_db)
+    try:
+        fee_schedule = _fee_schedule(args, params.eff_date)
+        if store is None:
+            result = estimate(params, fee_schedule, rule=_rule(args))
+        else:
+            result = store.estimate(params, fee_schedule, rule=_rule(args))
+        pdf = render_pdf_cached(result.setup, result.schedule, result.totals, args.date or date.today(), store=store)
+    finally:
+        if store is not None:
+            store.close()
+    if args.output == "-":
+        sys.stdout.buffer.write(pdf)
+    else:
+        with open(args.output, "wb") as f:
+            f.write(pdf)
+    return 0
+
+
+def cmd_batch(args):
+    from .batch import main as batch_main
+
+    argv = [args.input, "--schedules", args.schedules, "--totals", args.totals]
+    if args.chunk_size:
+        argv += ["--chunk-size", str(args.chunk_size)]
+    if args.months:
+        argv += ["--months", str(args.months)]
+    if args.errors:
+        argv += ["--errors", args.errors]
+    return batch_main(argv)
+
+
+def cmd_bulk(args):
+    from .bulk import main as bulk_main
+
+    argv = [args.input, "--out", args.out]
+    if args.workers:
+        argv += ["--workers", str(args.workers)]
+    return bulk_main(argv)
+
+
+def cmd_serve(args):
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("error: serving the API needs uvicorn: pip install uvicorn")
+    from .api import create_app
+
+    app = create_app(fee_db=args.fee_db, pdf_workers=args.pdf_workers, estimate_db=args.estimate_db)
+    uvicorn.run(app, host=args.host, port=args.port)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="fsadmin", description="CPAP EOB estimates without the Streamlit page.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("estimate", help="print one patient's schedule and totals as JSON")
+    _add_param_args(p)
+    p.add_argument("--lines", action="store_true", help="include per-item rental lines")
+    p.add_argument("--months", type=int, default=None, help="project this many months on real dates (multi-year)")
+    p.add_argument("--resupply", action="store_true",
+                   help="list dated rental and resupply claims instead of a monthly schedule")
+    p.add_argument("--indent", type=int, default=None, help="pretty-print the JSON")
+    p.set_defaults(func=cmd_estimate)
+
+    p = sub.add_parser("pdf", help="render one patient's EOB statement")
+    _add_param_args(p)
+    p.add_argument("-o", "--output", required=True, help="PDF file to write ('-' for stdout)")
+    p.add_argument("--date", type=date.fromisoformat, help="statement date (default: today)")
+    p.set_defaults(func=cmd_pdf)
+
+    p = sub.add_parser("batch", help="estimate every patient in a CSV/Parquet file")
+    p.add_argument("input")
+    p.add_argument("--schedules", required=True, help="output file for schedules (.csv/.parquet)")
+    p.add_argument("--totals", required=True, help="output file for totals (.csv/.parquet)")
+    p.add_argument("--chunk-size", type=int, default=None, help="use the vectorized engine, this many patients at a time")
+    p.add_argument("--months", type=int, default=None, help="project this many months on real dates (multi-year)")
+    p.add_argument("--errors", default=None, help="output file for rows that don't parse (default: stderr)")
+    p.set_defaults(func=cmd_batch)
+
+    p = sub.add_parser("bulk", help="render one PDF per patient into a directory or ZIP")
+    p.add_argument("input")
+    p.add_argument("--out", required=True, help="output directory, or a .zip file")
+    p.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    p.set_defaults(func=cmd_bulk)
+
+    p = sub.add_parser("serve", help="run the HTTP JSON API (see fsadmin.api)")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8000)
+    p.add_argument("--fee-db", default=None, help="fee store to price from (default: $FSADMIN_FEE_DB)")
+    p.add_argument("--pdf-workers", type=int, default=None, help="PDF worker processes (default: CPU count)")
+    p.add_argument("--estimate-db", default=None, help="persistent estimate store (default: $FSADMIN_ESTIMATE_DB)")
+    p.set_defaults(func=cmd_serve)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
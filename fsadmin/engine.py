@@ -0,0 +1,281 @@
+"""Pure cost engine for the CPAP EOB estimate.
+
+Nothing in here touches Streamlit, pandas or ReportLab: the page, the batch
+job and the benchmarks all call :func:`estimate` with the same inputs the
+sidebar collects and get plain lists/dicts back.  Amounts are adjudicated
+and summed in integer cents (see :mod:`fsadmin.money`); rows and totals carry
+dollars.
+"""
+import calendar
+from array import array
+from dataclasses import dataclass
+from datetime import date
+
+from .money import to_cents, to_dollars
+from .rules import COMMERCIAL_COINSURANCE
+
+# --- CPAP Fee Schedule ---
+FEE_SCHEDULE = [
+    {"code": "E0601", "charge": 73.18, "type": "monthly", "months": 10, "desc": "Device Rental"},
+    {"code": "E0562", "charge": 22.38, "type": "monthly", "months": 10, "desc": "Humidifier Rental"},
+    {"code": "A7037", "charge": 25.52, "type": "one-time", "desc": "Mask Setup"},
+    {"code": "A7038", "charge": 3.69,  "type": "one-time", "desc": "Mask Cushion"},
+    {"code": "A7034", "charge": 142.03,"type": "one-time", "desc": "Humidifier"},
+    {"code": "A7035", "charge": 27.22, "type": "one-time", "desc": "Tubing"},
+    {"code": "A7033", "charge": 53.03, "type": "one-time", "desc": "Filter Kit"},
+]
+
+
+@dataclass(frozen=True)
+class InsuranceParams:
+    """The sidebar inputs; ``coinsurance_rate`` is a fraction (0.2 == 20%)."""
+    eff_date: date
+    deductible_total: float
+    deductible_met: float
+    oop_max: float
+    oop_met: float
+    coinsurance_rate: float
+    reset_date: date
+
+
+@dataclass(frozen=True)
+class Estimate:
+    setup: list       # [{"Code", "Description", "Price"}, ...]
+    schedule: list    # [{"Month", "Patient Pays", "Insurance Pays"}, ...] for months 2+
+    totals: dict
+    lines: "RentalLines" = None  # per-item rental lines, when requested
+
+
+class RentalLines:
+    """Per-item rental lines for months 2+, stored in flat arrays.
+
+    One entry per (month, active rental item), month by month in fee-schedule
+    order: ``month[k]`` is the rental month number, ``item[k]`` indexes
+    ``items`` (the rental items) and ``allowed``/``patient``/``insurance`` are
+    amounts in cents.  :meth:`rows` materializes display dicts on demand.
+    """
+
+    __slots__ = ("items", "month_names", "month", "item", "allowed", "patient", "insurance")
+
+    def __init__(self, items):
+        self.items = items
+        self.month_names = {}
+        self.month = array("H")
+        self.item = array("H")
+        self.allowed = array("q")
+        self.patient = array("q")
+        self.insurance = array("q")
+
+    def __len__(self):
+        return len(self.month)
+
+    def rows(self):
+        """``[{"Month", "Code", "Description", "Allowed", "Patient Pays", "Insurance Pays"}, ...]``"""
+        items = self.items
+        return [
+            {
+                "Month": self.month_names[m],
+                "Code": items[j]["code"],
+                "Description": items[j]["desc"],
+                "Allowed": to_dollars(a),
+                "Patient Pays": to_dollars(p),
+                "Insurance Pays": to_dollars(i),
+            }
+            for m, j, a, p, i in zip(self.month, self.item, self.allowed, self.patient, self.insurance)
+        ]
+
+
+class CompiledFeeSchedule:
+    """A fee schedule with everything the engine needs precomputed once.
+
+    Rental item charges are kept in cents (``rental_cents``), with
+    ``active_by_month[m - 1]`` listing the indexes of the items billed in
+    rental month ``m`` (an item with ``months=6`` drops out after month 6);
+    payer rules build their month tables from these.  ``horizon`` is the
+    longest rental.  Totals are summed in cents (the ``*_cents`` attributes)
+    and also kept in dollars.
+    """
+
+    def __init__(self, fee_schedule):
+        self.items = list(fee_schedule)
+        self.key = fee_schedule_key(self.items)
+        self.monthly = [i for i in self.items if i["type"] == "monthly"]
+        self.one_time = [i for i in self.items if i["type"] == "one-time"]
+        self.setup_lines = _setup_lines(self.items)
+        self.setup_cents = sum(to_cents(r["Price"]) for r in self.setup_lines)
+        self.supply_cents = sum(to_cents(i["charge"]) for i in self.one_time)
+        self.monthly_cents = sum(to_cents(i["charge"]) for i in self.monthly)
+        self.horizon = max((i["months"] for i in self.monthly), default=0)
+        self.rental_cents = array("q", (to_cents(i["charge"]) for i in self.monthly))
+        self.active_by_month = [
+            tuple(j for j, i in enumerate(self.monthly) if i["months"] >= m)
+            for m in range(1, self.horizon + 1)
+        ]
+        self.rental_cents_total = sum(c * i["months"] for c, i in zip(self.rental_cents, self.monthly))
+        self.total_all_upfront_cents = self.supply_cents + self.rental_cents_total
+        self.setup_total = to_dollars(self.setup_cents)
+        self.supply_total = to_dollars(self.supply_cents)
+        self.monthly_total = to_dollars(self.monthly_cents)
+        self.total_all_upfront = to_dollars(self.total_all_upfront_cents)
+        # Tables derived from this schedule by other modules (e.g. payer rules), keyed by their owner.
+        self.derived = {}
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def compile_fee_schedule(fee_schedule=FEE_SCHEDULE):
+    """Compile ``fee_schedule``; already compiled schedules are returned as-is."""
+    if isinstance(fee_schedule, CompiledFeeSchedule):
+        return fee_schedule
+    compiled = getattr(fee_schedule, "compiled", None)
+    if compiled is not None:
+        return compiled
+    return CompiledFeeSchedule(fee_schedule)
+
+
+def normalize_params(params):
+    """Canonical form of ``params`` for use as a cache key.
+
+    Money is rounded to cents and the rate to 6 decimals, so values that only
+    differ by float noise from the widgets map to the same key.
+    """
+    return InsuranceParams(
+        eff_date=params.eff_date,
+        deductible_total=round(float(params.deductible_total), 2),
+        deductible_met=round(float(params.deductible_met), 2),
+        oop_max=round(float(params.oop_max), 2),
+        oop_met=round(float(params.oop_met), 2),
+        coinsurance_rate=round(float(params.coinsurance_rate), 6),
+        reset_date=params.reset_date,
+    )
+
+
+def fee_schedule_key(fee_schedule=FEE_SCHEDULE):
+    """Hashable form of a fee schedule; ``[dict(i) for i in key]`` restores it."""
+    if isinstance(fee_schedule, CompiledFeeSchedule):
+        return fee_schedule.key
+    return tuple(tuple(item.items()) for item in fee_schedule)
+
+
+def _setup_lines(fee_schedule):
+    lines = []
+    for item in fee_schedule:
+        if item["type"] == "one-time":
+            lines.append({
+                "Code": item["code"],
+                "Description": item["desc"],
+                "Price": round(item["charge"], 2)
+            })
+        else:  # monthly -> first-month entry
+            lines.append({
+                "Code": item["code"],
+                "Description": f"{item['desc']} (1st Month)",
+                "Price": round(item["charge"], 2)
+            })
+    return lines
+
+
+def build_setup_lines(fee_schedule=FEE_SCHEDULE):
+    """Setup charges: every one-time supply plus the first month of each rental."""
+    return [dict(r) for r in compile_fee_schedule(fee_schedule).setup_lines]
+
+
+def build_schedule(params, fee_schedule=FEE_SCHEDULE, lines=None, rule=None):
+    """Monthly rental schedule (months 2+) under a payer rule.
+
+    ``rule`` (default: the commercial deductible -> coinsurance -> OOP
+    cascade, see :mod:`fsadmin.rules`) decides which rental lines are billed
+    each month and how each splits between patient and insurance.  Each
+    rental item billed that month is adjudicated as its own line, in
+    fee-schedule order, and the month row is the sum of its lines.  Pass a
+    :class:`RentalLines` as ``lines`` to also collect the per-item lines.
+    """
+    return _build_schedule(params, compile_fee_schedule(fee_schedule), lines, rule)[0]
+
+
+def _build_schedule(params, fees, lines, rule):
+    # (schedule rows, patient cents, insurance cents, rental allowed cents)
+    evaluator = (rule or COMMERCIAL_COINSURANCE).compile(params, fees)
+    adjudicate_lines = evaluator.adjudicate_lines
+    lines_by_month = evaluator.lines_by_month
+    schedule = []
+    total_pat = total_ins = 0
+
+    for m in range(2, len(lines_by_month) + 1):
+        month_index = (params.eff_date.month + m - 2) % 12 + 1
+        month_name = calendar.month_name[month_index]
+        if month_index == params.reset_date.month:
+            evaluator.reset_deductible()
+
+        month_lines = lines_by_month[m - 1]
+        if lines is None:
+            month_pat, month_ins = adjudicate_lines(month_lines)
+        else:
+            out = []
+            month_pat, month_ins = adjudicate_lines(month_lines, out)
+            for (j, allowed), (pat, ins) in zip(month_lines, out):
+                lines.month.append(m)
+                lines.item.append(j)
+                lines.allowed.append(allowed)
+                lines.patient.append(pat)
+                lines.insurance.append(ins)
+            lines.month_names[m] = month_name
+        total_pat += month_pat
+        total_ins += month_ins
+        schedule.append({
+            "Month": month_name,
+            "Patient Pays": to_dollars(month_pat),
+            "Insurance Pays": to_dollars(month_ins)
+        })
+    return schedule, total_pat, total_ins, evaluator.rental_allowed
+
+
+def compute_totals(setup, schedule, fee_schedule=FEE_SCHEDULE):
+    """Estimated totals for a setup table and rental schedule, summed in cents.
+
+    Each month's patient and insurance shares add up to what was allowed, so
+    the upfront total is the setup plus both columns of the full ``schedule``.
+    """
+    patient_cents = sum(to_cents(r["Patient Pays"]) for r in schedule)
+    insurance_cents = sum(to_cents(r["Insurance Pays"]) for r in schedule)
+    return _totals(
+        compile_fee_schedule(fee_schedule),
+        sum(to_cents(r["Price"]) for r in setup),
+        patient_cents,
+        insurance_cents,
+        patient_cents + insurance_cents,
+    )
+
+
+def _totals(fees, setup_cents, patient_cents, insurance_cents, rental_allowed):
+    # ``rental_allowed``: cents allowed for rental months 2+ under the payer
+    # rule (after any cap or rate step), so the upfront total is what's billed.
+    return {
+        "setup_total": to_dollars(setup_cents),
+        "estimated_patient": to_dollars(setup_cents + patient_cents),
+        "estimated_insurance": to_dollars(insurance_cents),
+        "supply_total": fees.supply_total,
+        "monthly_total": fees.monthly_total,
+        "max_months": fees.horizon,
+        "total_all_upfront": to_dollars(setup_cents + rental_allowed),
+    }
+
+
+def estimate(params, fee_schedule=FEE_SCHEDULE, item_lines=False, rule=None):
+    """Compute setup lines, rental schedule and totals for one patient.
+
+    Pass a :class:`CompiledFeeSchedule` when estimating many patients so the
+    schedule is only compiled once.  ``item_lines=True`` also returns the
+    per-item rental lines as ``Estimate.lines``.  ``rule`` is the payer rule
+    (see :mod:`fsadmin.rules`); the default is commercial coinsurance.
+    """
+    fees = compile_fee_schedule(fee_schedule)
+    lines = RentalLines(fees.monthly) if item_lines else None
+    setup = build_setup_lines(fees)
+    schedule, patient_cents, insurance_cents, rental_allowed = _build_schedule(params, fees, lines, rule)
+    totals = _totals(fees, fees.setup_cents, patient_cents, insurance_cents, rental_allowed)
+    return Estimate(setup=setup, schedule=schedule, totals=totals, lines=lines)
@@ -0,0 +1,245 @@
+"""Persistent store of computed estimates (and PDFs), shared across processes.
+
+Entries are content-addressed: an estimate's key is a hash of the normalized
+insurance parameters, the fee schedule's contents, the payer rule and
+:data:`ENGINE_VERSION`, so identical requests from any process, before or
+after a restart, are one SQLite lookup.  Rendered PDFs are stored next to
+them under their :func:`fsadmin.pdfcache.pdf_key`.
+
+The file is capped at ``max_bytes`` of values; the least recently used
+entries are evicted first.  The running total is kept by triggers, so it
+stays right with several processes writing.  Hits don't write: their
+last-used times are batched and saved with the next write (or every
+:data:`TOUCH_FLUSH_SECONDS`).  Hits, misses, writes and evictions are
+counted per store object (:meth:`EstimateStore.stats`); estimate and PDF
+lookups are also counted process-wide in :mod:`fsadmin.metrics`.
+
+    FSADMIN_ESTIMATE_DB=estimates.db streamlit run FSlogic_WM_fixed.py
+    python -m fsadmin serve --estimate-db estimates.db
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from .engine import (
+    FEE_SCHEDULE, Estimate, RentalLines, build_setup_lines, compile_fee_schedule, estimate, normalize_params
+)
+from .metrics import cache_lookup
+from .rules import COMMERCIAL_COINSURANCE
+
+# Bump when the engine's numbers change, so stored estimates are not reused.
+ENGINE_VERSION = 4
+ESTIMATE_STORE_MAX_BYTES = 256 * 1024 * 1024
+# Longest a hit's last-used time waits before it is written.
+TOUCH_FLUSH_SECONDS = 5.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key       TEXT    PRIMARY KEY,
+    kind      TEXT    NOT NULL CHECK (kind IN ('estimate', 'pdf')),
+    value     BLOB    NOT NULL,
+    size      INTEGER NOT NULL,
+    last_used REAL    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+CREATE TABLE IF NOT EXISTS entries_meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO entries_meta (key, value) VALUES ('bytes', 0);
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    UPDATE entries_meta SET value = value + NEW.size WHERE key = 'bytes';
+END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    UPDATE entries_meta SET value = value - OLD.size WHERE key = 'bytes';
+END;
+"""
+
+_STATS = ("hits", "misses", "writes", "evictions")
+
+
+def _fees_digest(fees):
+    # Hashed once per compiled schedule.
+    digest = fees.derived.get("estimate_key")
+    if digest is None:
+        items = [sorted(item.items()) for item in fees.items]
+        digest = hashlib.sha256(json.dumps(items, default=str).encode()).hexdigest()
+        fees.derived["estimate_key"] = digest
+    return digest
+
+
+def estimate_key(params, fee_schedule=FEE_SCHEDULE, rule=None, item_lines=False):
+    """Content hash identifying the estimate of ``params`` under ``fee_schedule`` and ``rule``."""
+    p = normalize_params(params)
+    payload = (
+        ENGINE_VERSION,
+        p.eff_date.isoformat(), p.deductible_total, p.deductible_met, p.oop_max, p.oop_met,
+        p.coinsurance_rate, p.reset_date.isoformat(),
+        _fees_digest(compile_fee_schedule(fee_schedule)),
+        (rule or COMMERCIAL_COINSURANCE).key,
+        bool(item_lines),
+    )
+    return hashlib.sha256(repr(payload).encode()).hexdigest()
+
+
+def _dump_estimate(result):
+    # The setup lines only depend on the fee schedule, which the key covers.
+    value = {"schedule": result.schedule, "totals": result.totals}
+    lines = result.lines
+    if lines is not None:
+        value["lines"] = {
+            "month_names": lines.month_names,
+            "month": lines.month.tolist(),
+            "item": lines.item.tolist(),
+            "allowed": lines.allowed.tolist(),
+            "patient": lines.patient.tolist(),
+            "insurance": lines.insurance.tolist(),
+        }
+    return json.dumps(value, separators=(",", ":")).encode()
+
+
+def _load_estimate(blob, fees):
+    value = json.loads(blob)
+    lines = None
+    stored = value.get("lines")
+    if stored is not None:
+        lines = RentalLines(fees.monthly)
+        lines.month_names = {int(m): name for m, name in stored["month_names"].items()}
+        for name in ("month", "item", "allowed", "patient", "insurance"):
+            getattr(lines, name).extend(stored[name])
+    return Estimate(setup=build_setup_lines(fees), schedule=value["schedule"], totals=value["totals"], lines=lines)
+
+
+class EstimateStore:
+    """SQLite-backed estimate and PDF store; safe to share between threads."""
+
+    def __init__(self, path, max_bytes=ESTIMATE_STORE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+        self._lock = threading.RLock()
+        self._stats = dict.fromkeys(_STATS, 0)
+        self._touched = {}   # key -> last-used time not yet written
+        self._flushed_at = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            with self._conn:
+                self._flush_touched()
+            self._conn.close()
+
+    # --- Raw Entries ---
+    def get(self, key):
+        """Stored bytes for ``key``, or None; a hit marks the entry as recently used."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+            self._touched[key] = time.time()
+            if time.monotonic() - self._flushed_at > TOUCH_FLUSH_SECONDS:
+                with self._conn:
+                    self._flush_touched()
+            return bytes(row[0])
+
+    def _flush_touched(self):
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE entries SET last_used = ? WHERE key = ?",
+                [(when, key) for key, when in self._touched.items()],
+            )
+            self._touched.clear()
+        self._flushed_at = time.monotonic()
+
+    def put(self, key, kind, value):
+        """Store ``value`` bytes under ``key``, evicting old entries past ``max_bytes``."""
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock, self._conn:
+            self._flush_touched()
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._conn.execute(
+                "INSERT INTO entries (key, kind, value, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, kind, value, size, time.time()),
+            )
+            self._stats["writes"] += 1
+            self._evict()
+
+    def _evict(self):
+        over = self._bytes() - self.max_bytes
+        if over <= 0:
+            return
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY last_used"):
+            victims.append((key,))
+            over -= size
+            if over <= 0:
+                break
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+        self._stats["evictions"] += len(victims)
+
+    def _bytes(self):
+        return self._conn.execute("SELECT value FROM entries_meta WHERE key = 'bytes'").fetchone()[0]
+
+    # --- Estimates and PDFs ---
+    def estimate(self, params, fee_schedule=FEE_SCHEDULE, item_lines=False, rule=None):
+        """:func:`fsadmin.engine.estimate`, computed once per distinct input and then loaded."""
+        fees = compile_fee_schedule(fee_schedule)
+        key = estimate_key(params, fees, rule, item_lines)
+        blob = self.get(key)
+        cache_lookup("estimate_store", blob is not None)
+        if blob is not None:
+            return _load_estimate(blob, fees)
+        result = estimate(normalize_params(params), fees, item_lines=item_lines, rule=rule)
+        self.put(key, "estimate", _dump_estimate(result))
+        return result
+
+    def get_pdf(self, key):
+        pdf = self.get(key)
+        cache_lookup("pdf_store", pdf is not None)
+        return pdf
+
+    def put_pdf(self, key, pdf):
+        self.put(key, "pdf", pdf)
+
+    # --- Housekeeping ---
+    def stats(self):
+        """Counters for this object plus the store's current entries and bytes."""
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT kind, COUNT(*) FROM entries GROUP BY kind").fetchall())
+            stats = dict(self._stats)
+            stats["estimates"] = counts.get("estimate", 0)
+            stats["pdfs"] = counts.get("pdf", 0)
+            stats["bytes"] = self._bytes()
+            stats["max_bytes"] = self.max_bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._touched.clear()
+            self._conn.execute("DELETE FROM entries")
+
+
+def open_estimate_store(path=None, max_bytes=None):
+    """Open the store at ``path`` (default: ``$FSADMIN_ESTIMATE_DB``); None if neither is set.
+
+    ``max_bytes`` defaults to ``$FSADMIN_ESTIMATE_DB_MAX_BYTES`` or
+    :data:`ESTIMATE_STORE_MAX_BYTES`.
+    """
+    path = path or os.environ.get("FSADMIN_ESTIMATE_DB")
+    if not path:
+        return None
+    if max_bytes is None:
+        max_bytes = int(os.environ.get("FSADMIN_ESTIMATE_DB_MAX_BYTES", ESTIMATE_STORE_MAX_BYTES))
+    return EstimateStore(path, max_bytes)
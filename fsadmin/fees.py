@@ -0,0 +1,313 @@
+"""Versioned fee schedules per payer, stored in SQLite.
+
+Each row is one HCPCS code for one payer over an effective-date range
+``[effective_from, effective_to)`` (``effective_to`` NULL = open-ended).  A
+payer's rows are read once, on first use; :meth:`FeeScheduleStore.schedule`
+then resolves the codes in effect on a date into a :class:`FeeSchedule`, which
+iterates like the plain ``FEE_SCHEDULE`` list the engine takes and adds O(1)
+code lookup and the monthly/one-time partitions.
+
+Every write bumps the store ``version``, which loaded schedules carry along so
+caches can tell schedules apart.  Rows are checked before anything is written
+(a ``monthly`` code needs whole ``months`` >= 1, charges are finite and >= 0),
+so a bad import is rejected as a whole, naming the row.
+
+    python -m fsadmin.fees fees.db import payer_fees.csv
+    python -m fsadmin.fees fees.db show DEFAULT 2024-01-01
+"""
+import argparse
+import bisect
+import csv
+import math
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from datetime import date
+
+from .engine import FEE_SCHEDULE, CompiledFeeSchedule
+
+DEFAULT_PAYER = "DEFAULT"
+# Codes priced for an estimate: the CPAP package from the built-in schedule.
+PACKAGE_CODES = [i["code"] for i in FEE_SCHEDULE]
+# Resolved (payer, date) schedules kept in memory per store.
+SCHEDULE_CACHE_SIZE = 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fee_schedule (
+    payer          TEXT    NOT NULL,
+    code           TEXT    NOT NULL,
+    effective_from TEXT    NOT NULL,
+    effective_to   TEXT,
+    charge         REAL    NOT NULL,
+    type           TEXT    NOT NULL CHECK (type IN ('monthly', 'one-time')),
+    months         INTEGER,
+    description    TEXT    NOT NULL DEFAULT '',
+    position       INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (payer, code, effective_from)
+);
+CREATE INDEX IF NOT EXISTS fee_schedule_payer_dates
+    ON fee_schedule (payer, effective_from, effective_to);
+CREATE TABLE IF NOT EXISTS fee_schedule_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+CSV_COLUMNS = ["payer", "code", "charge", "type", "months", "desc", "effective_from", "effective_to"]
+
+
+def _fee_row(payer, code, effective_from, effective_to, charge, kind, months, desc, position):
+    # One fee_schedule row, checked so the engine can price it; ValueError naming the field otherwise.
+    if not payer or not code:
+        raise ValueError("payer and code are required")
+    try:
+        effective_from = date.fromisoformat(str(effective_from)).isoformat()
+        effective_to = date.fromisoformat(str(effective_to)).isoformat() if effective_to else None
+    except ValueError:
+        raise ValueError(f"effective dates must be YYYY-MM-DD: {effective_from!r}, {effective_to!r}") from None
+    try:
+        amount = float(charge)
+    except (TypeError, ValueError):
+        raise ValueError(f"charge: bad value {charge!r}") from None
+    if not 0 <= amount < math.inf:
+        raise ValueError(f"charge: {charge!r} is not an amount >= 0")
+    if kind not in ("monthly", "one-time"):
+        raise ValueError(f"type: {kind!r} is not 'monthly' or 'one-time'")
+    if months is not None and months != "":
+        try:
+            months = int(str(months).strip())
+        except ValueError:
+            raise ValueError(f"months: {months!r} is not a whole number") from None
+    else:
+        months = None
+    if kind == "monthly" and (months is None or months < 1):
+        raise ValueError(f"months: a monthly code needs months >= 1, got {months!r}")
+    return (payer, code, effective_from, effective_to, amount, kind, months, desc, position)
+
+
+class FeeSchedule:
+    """The codes in effect for one payer on one date."""
+
+    def __init__(self, payer, as_of, version, items):
+        self.payer = payer
+        self.as_of = as_of
+        self.version = version
+        self.items = items
+        self.by_code = {i["code"]: i for i in items}
+        self.monthly = [i for i in items if i["type"] == "monthly"]
+        self.one_time = [i for i in items if i["type"] == "one-time"]
+        self._compiled = None
+        self._selected = {}   # codes tuple -> CompiledFeeSchedule
+
+    @property
+    def compiled(self):
+        """The whole schedule as a :class:`CompiledFeeSchedule`, built on first use."""
+        if self._compiled is None:
+            self._compiled = CompiledFeeSchedule(self.items)
+        return self._compiled
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, code):
+        return code in self.by_code
+
+    def get(self, code, default=None):
+        return self.by_code.get(code, default)
+
+    def select(self, codes):
+        """Items for ``codes`` (in that order) that this payer covers, e.g. an equipment package.
+
+        Returns a CompiledFeeSchedule ready for the engine, compiled once per
+        ``codes`` so its derived tables (payer-rule months, estimate keys) are
+        kept across calls.
+        """
+        codes = tuple(codes)
+        compiled = self._selected.get(codes)
+        if compiled is None:
+            compiled = CompiledFeeSchedule([self.by_code[c] for c in codes if c in self.by_code])
+            compiled = self._selected.setdefault(codes, compiled)
+        return compiled
+
+    def __repr__(self):
+        return f"<FeeSchedule {self.payer} {self.as_of} v{self.version}: {len(self.items)} codes>"
+
+
+class FeeScheduleStore:
+    """SQLite-backed fee schedules; safe to share between threads."""
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.RLock()
+        self._payers = {}                 # payer -> {code: ([from, ...], [(to, position, item), ...])}
+        self._schedules = OrderedDict()   # (payer, as_of) -> FeeSchedule
+        self._payer_names = None
+        self._version = None
+
+    def close(self):
+        self._conn.close()
+
+    @property
+    def version(self):
+        with self._lock:
+            if self._version is None:
+                row = self._conn.execute(
+                    "SELECT value FROM fee_schedule_meta WHERE key = 'version'"
+                ).fetchone()
+                self._version = int(row[0]) if row else 0
+            return self._version
+
+    def payers(self):
+        """Payer IDs in the store, sorted; read once (until :meth:`reload`)."""
+        with self._lock:
+            if self._payer_names is None:
+                self._payer_names = tuple(
+                    r[0] for r in self._conn.execute("SELECT DISTINCT payer FROM fee_schedule ORDER BY payer")
+                )
+            return list(self._payer_names)
+
+    def reload(self):
+        """Forget everything loaded so far, e.g. after another process wrote to the file."""
+        with self._lock:
+            self._payers.clear()
+            self._schedules.clear()
+            self._payer_names = None
+            self._version = None
+
+    def _load_payer(self, payer):
+        codes = self._payers.get(payer)
+        if codes is None:
+            rows = self._conn.execute(
+                "SELECT code, effective_from, effective_to, charge, type, months, description, position"
+                " FROM fee_schedule WHERE payer = ? ORDER BY code, effective_from",
+                (payer,),
+            )
+            codes = {}
+            for code, start, end, charge, kind, months, desc, position in rows:
+                item = {"code": code, "charge": charge, "type": kind, "desc": desc}
+                if kind == "monthly":
+                    item["months"] = months
+                starts, spans = codes.setdefault(code, ([], []))
+                starts.append(start)
+                spans.append((end, position, item))
+            self._payers[payer] = codes
+        return codes
+
+    def schedule(self, payer=DEFAULT_PAYER, as_of=None):
+        """The :class:`FeeSchedule` for ``payer`` in effect on ``as_of`` (default: today)."""
+        as_of = (as_of or date.today()).isoformat()
+        key = (payer, as_of)
+        with self._lock:
+            cached = self._schedules.get(key)
+            if cached is not None:
+                self._schedules.move_to_end(key)
+                return cached
+            active = []
+            for starts, spans in self._load_payer(payer).values():
+                k = bisect.bisect_right(starts, as_of) - 1
+                if k >= 0:
+                    end, position, item = spans[k]
+                    if end is None or as_of < end:
+                        active.append((position, item))
+            active.sort(key=lambda p: p[0])
+            result = FeeSchedule(payer, as_of, self.version, [item for _, item in active])
+            self._schedules[key] = result
+            if len(self._schedules) > SCHEDULE_CACHE_SIZE:
+                self._schedules.popitem(last=False)
+            return result
+
+    def package(self, payer=DEFAULT_PAYER, as_of=None, codes=PACKAGE_CODES):
+        """The equipment package ``codes`` priced from ``payer``'s schedule, compiled for the engine."""
+        return self.schedule(payer, as_of).select(codes)
+
+    def put(self, payer, items, effective_from, effective_to=None):
+        """Store ``items`` (FEE_SCHEDULE-style dicts) for ``payer`` over a date range.
+
+        Raises ValueError, writing nothing, if an item can't be priced.
+        """
+        rows = []
+        for n, i in enumerate(items):
+            try:
+                rows.append(_fee_row(payer, i["code"], effective_from, effective_to, i["charge"],
+                                     i["type"], i.get("months"), i.get("desc", ""), n))
+            except ValueError as e:
+                raise ValueError(f"item {n} ({i.get('code')}): {e}") from None
+        self._write(rows)
+
+    def import_csv(self, path):
+        """Load rows with :data:`CSV_COLUMNS` from a CSV file; returns the row count.
+
+        Raises ValueError naming the first bad row (1-based), writing nothing.
+        """
+        rows = []
+        with open(path, newline="") as f:
+            for n, r in enumerate(csv.DictReader(f)):
+                try:
+                    rows.append(_fee_row(r["payer"], r["code"], r["effective_from"], r.get("effective_to"),
+                                         r["charge"], r["type"], r.get("months"), r.get("desc", ""), n))
+                except ValueError as e:
+                    raise ValueError(f"{path}, row {n + 1}: {e}") from None
+        self._write(rows)
+        return len(rows)
+
+    def _write(self, rows):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO fee_schedule"
+                " (payer, code, effective_from, effective_to, charge, type, months, description, position)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.execute(
+                "INSERT INTO fee_schedule_meta (key, value) VALUES ('version', '1')"
+                " ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+            )
+        self.reload()
+
+
+def open_store(path, seed=True):
+    """Open (creating if needed) a store; an empty store gets the built-in schedule as DEFAULT."""
+    store = FeeScheduleStore(path)
+    if seed and store.version == 0:
+        store.put(DEFAULT_PAYER, FEE_SCHEDULE, date(2000, 1, 1))
+    return store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the fee schedule store.")
+    parser.add_argument("db", help="SQLite file (created if missing)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_import = sub.add_parser("import", help="import a CSV with columns " + ", ".join(CSV_COLUMNS))
+    p_import.add_argument("csv")
+    p_show = sub.add_parser("show", help="print the schedule for a payer on a date")
+    p_show.add_argument("payer")
+    p_show.add_argument("as_of", nargs="?", type=date.fromisoformat)
+    sub.add_parser("payers", help="list payers")
+    args = parser.parse_args(argv)
+
+    store = open_store(args.db)
+    if args.command == "import":
+        try:
+            count = store.import_csv(args.csv)
+        except ValueError as e:
+            print(f"import rejected: {e}", file=sys.stderr)
+            return 1
+        print(f"{count} row(s) imported, version {store.version}")
+    elif args.command == "payers":
+        print("\n".join(store.payers()))
+    else:
+        schedule = store.schedule(args.payer, args.as_of)
+        print(schedule)
+        for i in schedule:
+            print(f"  {i['code']:8} {i['type']:9} {i['charge']:>9.2f}  {i.get('months') or '':>3}  {i['desc']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
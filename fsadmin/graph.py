@@ -0,0 +1,150 @@
+"""Dependency-tracked recomputation of an estimate, for interactive reruns.
+
+A :class:`Graph` holds input values and derived nodes.  A node is recomputed
+only when the version of one of its dependencies changed since it last ran,
+and a recomputed node whose value came out equal keeps its version, so
+nothing downstream of it reruns either.  ``Graph.recomputed`` lists the nodes
+that ran since :meth:`Graph.start_run`.
+
+:func:`estimate_graph` wires up the estimate itself::
+
+    inputs:   params, fees, rule, setup_prices
+    setup_lines       <- fees
+    schedule          <- params, fees, rule
+    setup_total       <- setup_prices
+    rental_patient    <- schedule
+    estimated_patient <- setup_total, rental_patient
+    estimated_insurance <- schedule
+    rental_allowed    <- params, fees, rule
+    total_all_upfront <- setup_total, rental_allowed
+    totals            <- all of the above
+
+so editing a setup price only reruns ``setup_total``, ``estimated_patient``,
+``total_all_upfront`` and ``totals``.
+"""
+from .engine import RentalLines, build_schedule, build_setup_lines, compile_fee_schedule
+from .money import sum_dollars, to_dollars
+from .rules import COMMERCIAL_COINSURANCE
+
+
+def _same(a, b):
+    if a is b:
+        return True
+    try:
+        return bool(a == b)
+    except (TypeError, ValueError):   # e.g. DataFrames, which compare element-wise
+        return False
+
+
+class Graph:
+    """Input values and memoized nodes computed from them."""
+
+    def __init__(self):
+        self._nodes = {}      # name -> (fn, deps)
+        self._values = {}
+        self._keys = {}       # input name -> key the value was compared by
+        self._versions = {}   # name -> bumped whenever the value changes
+        self._stamps = {}     # node name -> dependency versions it was computed from
+        self.recomputed = []
+
+    def add(self, name, fn, deps=()):
+        """Register node ``name`` as ``fn(*values of deps)``."""
+        self._nodes[name] = (fn, tuple(deps))
+        self._stamps.pop(name, None)
+
+    def node(self, *deps):
+        """Decorator form of :meth:`add`, named after the function."""
+        def register(fn):
+            self.add(fn.__name__, fn, deps)
+            return fn
+        return register
+
+    def set(self, name, value, key=None):
+        """Set input ``name``; dependents rerun only if ``key`` (default: the value) changed."""
+        key = value if key is None else key
+        if name in self._keys and _same(self._keys[name], key):
+            return
+        self._keys[name] = key
+        self._values[name] = value
+        self._versions[name] = self._versions.get(name, 0) + 1
+
+    def get(self, name):
+        """Current value of ``name``, recomputing it (and its dependencies) if stale."""
+        if name not in self._nodes:
+            if name not in self._versions:
+                raise KeyError(f"input {name!r} was never set")
+            return self._values[name]
+        fn, deps = self._nodes[name]
+        args = [self.get(d) for d in deps]
+        stamp = tuple(self._versions[d] for d in deps)
+        if self._stamps.get(name) != stamp:
+            value = fn(*args)
+            self._stamps[name] = stamp
+            self.recomputed.append(name)
+            if name not in self._versions or not _same(self._values[name], value):
+                self._values[name] = value
+                self._versions[name] = self._versions.get(name, 0) + 1
+        return self._values[name]
+
+    def start_run(self):
+        """Start a new rerun: clear :attr:`recomputed`."""
+        self.recomputed = []
+
+
+def _schedule(params, fees, rule):
+    lines = RentalLines(fees.monthly)
+    return build_schedule(params, fees, lines, rule), lines.rows()
+
+
+def estimate_graph(schedule=_schedule):
+    """A :class:`Graph` computing the estimate from ``params``, ``fees``, ``rule`` and ``setup_prices``.
+
+    ``schedule(params, compiled_fees, rule)`` returns ``(schedule rows, rental
+    line rows)``; the page passes a cached version.  ``rule`` is the payer rule
+    (see :mod:`fsadmin.rules`), best set with ``key=rule.key``.  ``setup_prices`` is the
+    (possibly edited) Price column of the setup table.
+    """
+    graph = Graph()
+    graph.add("compiled_fees", compile_fee_schedule, ["fees"])
+    graph.add("setup_lines", build_setup_lines, ["compiled_fees"])
+    graph.add("schedule", schedule, ["params", "compiled_fees", "rule"])
+
+    @graph.node("setup_prices")
+    def setup_total(prices):
+        return sum_dollars(prices)
+
+    @graph.node("schedule")
+    def rental_patient(schedule):
+        return sum_dollars(r["Patient Pays"] for r in schedule[0])
+
+    @graph.node("setup_total", "rental_patient")
+    def estimated_patient(setup_total, rental_patient):
+        return sum_dollars((setup_total, rental_patient))
+
+    @graph.node("schedule")
+    def estimated_insurance(schedule):
+        return sum_dollars(r["Insurance Pays"] for r in schedule[0])
+
+    @graph.node("params", "compiled_fees", "rule")
+    def rental_allowed(params, fees, rule):
+        # What the payer rule allows for the rental after setup (caps, rate steps).
+        return to_dollars((rule or COMMERCIAL_COINSURANCE).compile(params, fees).rental_allowed)
+
+    @graph.node("setup_total", "rental_allowed")
+    def total_all_upfront(setup_total, rental_allowed):
+        return sum_dollars((setup_total, rental_allowed))
+
+    @graph.node("setup_total", "estimated_patient", "estimated_insurance", "total_all_upfront", "compiled_fees")
+    def totals(setup_total, estimated_patient, estimated_insurance, total_all_upfront, fees):
+        # Same keys as engine.compute_totals.
+        return {
+            "setup_total": setup_total,
+            "estimated_patient": estimated_patient,
+            "estimated_insurance": estimated_insurance,
+            "supply_total": fees.supply_total,
+            "monthly_total": fees.monthly_total,
+            "max_months": fees.horizon,
+            "total_all_upfront": total_all_upfront,
+        }
+
+    return graph
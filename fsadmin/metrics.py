@@ -0,0 +1,207 @@
+"""Process-wide throughput metrics in the Prometheus text exposition format.
+
+Estimates and PDFs are tracked the same way: a ``_total`` counter of the ones
+generated, a ``_failures_total`` counter of the ones that raised, and a
+``_seconds`` histogram of how long each took, for latency percentiles:
+
+    histogram_quantile(0.95, rate(fsadmin_pdf_seconds_bucket[5m]))
+
+Cache lookups are counted by cache and result, so hit rates are one query:
+
+    sum by (cache) (rate(fsadmin_cache_lookups_total{result="hit"}[5m]))
+      / sum by (cache) (rate(fsadmin_cache_lookups_total[5m]))
+
+Everything is kept in :data:`REGISTRY`.  The metrics are updated under
+their own locks, so the page's concurrent session threads, the API's
+threadpool and PDF callbacks can all report into it.  The API serves it at
+``GET /metrics``.  The page serves it on ``$FSADMIN_METRICS_PORT``
+through :func:`start_http_server`:
+
+    FSADMIN_METRICS_PORT=9464 streamlit run FSlogic_WM_fixed.py
+    curl localhost:9464/metrics
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implied.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, values)) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """A monotonically increasing count, optionally split by label values."""
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {} if labelnames else {(): 0}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        """Add ``amount``; ``labels`` are the values of :attr:`labelnames`, in order."""
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {labels}")
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [(self.name + _labels(self.labelnames, labels), value) for labels, value in values]
+
+
+class Histogram:
+    """Counts of observations at or below each bucket bound, with their sum."""
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)   # last one is +Inf
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+
+    @property
+    def count(self):
+        with self._lock:
+            return sum(self._counts)
+
+    def samples(self):
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        out = []
+        cumulative = 0
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            cumulative += n
+            out.append((f'{self.name}_bucket{{le="{_number(bound)}"}}', cumulative))
+        out.append((f"{self.name}_sum", total))
+        out.append((f"{self.name}_count", cumulative))
+        return out
+
+
+class Operation:
+    """Generated / failed counters and a latency histogram for one kind of work."""
+
+    def __init__(self, registry, name, what):
+        self.total = registry.counter(f"{name}_total", f"{what} generated.")
+        self.failures = registry.counter(f"{name}_failures_total", f"{what} that failed.")
+        self.seconds = registry.histogram(f"{name}_seconds", f"Seconds taken to generate {what.lower()}.")
+
+    @contextmanager
+    def track(self):
+        """Time the block; it counts as generated, or as a failure if it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.failures.inc()
+            raise
+        self.seconds.observe(time.perf_counter() - start)
+        self.total.inc()
+
+
+class Registry:
+    """A set of metrics, by name; safe to share between threads."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_add(self, cls, name, *args):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"metric {name!r} is already a {metric.kind}")
+            return metric
+
+    def counter(self, name, help, labelnames=()):
+        """The counter called ``name``, created on first use."""
+        return self._get_or_add(Counter, name, help, labelnames)
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS):
+        """The histogram called ``name``, created on first use."""
+        return self._get_or_add(Histogram, name, help, buckets)
+
+    def to_prometheus(self):
+        """Every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        out = []
+        for metric in metrics:
+            out.append(f"# HELP {metric.name} {metric.help}")
+            out.append(f"# TYPE {metric.name} {metric.kind}")
+            out.extend(f"{sample} {_number(value)}" for sample, value in metric.samples())
+        return "\n".join(out) + "\n"
+
+
+REGISTRY = Registry()
+
+ESTIMATES = Operation(REGISTRY, "fsadmin_estimates", "Estimates")
+PDFS = Operation(REGISTRY, "fsadmin_pdfs", "PDFs")
+CACHE_LOOKUPS = REGISTRY.counter(
+    "fsadmin_cache_lookups_total", "Cache lookups, by cache and result (hit or miss).", ("cache", "result")
+)
+
+
+def cache_lookup(cache, hit):
+    """Count one lookup in ``cache`` (e.g. ``"pdf_memory"``)."""
+    CACHE_LOOKUPS.inc(cache, "hit" if hit else "miss")
+
+
+# --- HTTP ---
+def start_http_server(port, addr="127.0.0.1", registry=REGISTRY):
+    """Serve ``registry`` at ``http://addr:port/metrics`` from a daemon thread; returns the server.
+
+    Call ``server.shutdown()`` to stop it.  Raises OSError if the port is taken.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.to_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((addr, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
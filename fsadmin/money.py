@@ -0,0 +1,90 @@
+"""Money as integer cents.
+
+The engine adjudicates in whole cents so sums are exact however many lines,
+months or patients they cover; dollars only appear at the edges (fee
+schedules and parameters in, display rows and totals out).  Rounding rules:
+
+* Dollar amounts become cents half-up, decided on the amount as written
+  (``1.005`` -> 101), not on its binary float value.
+* Rates (coinsurance, rental rate steps) are held in parts per million, as
+  :func:`fsadmin.engine.normalize_params` already rounds them to 6 decimals.
+* A rental rate step is rounded half-up to the cent on each line: it sets
+  the allowed amount.
+* Coinsurance is not rounded per line.  A claim (one month's rental lines,
+  or one resupply claim) is adjudicated exactly in cents * PPM and the
+  patient's share rounded half-up to the cent once.  Its lines split that
+  share by the rounded running total, the insurance share is the exact
+  remainder, and the OOP accumulator keeps the unrounded remainder.
+* Everything else (deductible, sums) is integer arithmetic.
+
+Plain ints are used in the scalar engine and int64 arrays in
+:mod:`fsadmin.vectorized` (see :func:`to_cents_array`); both follow these
+rules, so the two stay identical.
+"""
+import math
+from decimal import ROUND_HALF_UP, Decimal
+
+PPM = 1_000_000
+_HALF_PPM = PPM // 2
+_CENT = Decimal("0.01")
+
+# How close to a half cent a scaled float must be before the decimal value decides.
+_TIE = 1e-6
+
+
+def _decimal_cents(amount):
+    return int(Decimal(repr(float(amount))).quantize(_CENT, ROUND_HALF_UP) * 100)
+
+
+def to_cents(amount):
+    """``amount`` dollars as int cents, half-up."""
+    if isinstance(amount, int):
+        return amount * 100
+    scaled = float(amount) * 100.0
+    if abs(scaled - math.floor(scaled) - 0.5) < _TIE:
+        return _decimal_cents(amount)
+    return math.floor(scaled + 0.5)
+
+
+def to_dollars(cents):
+    """Int cents as a float dollar amount (the float nearest the exact value)."""
+    return cents / 100
+
+
+def to_ppm(rate):
+    """A rate (0.2 == 20%) in parts per million, half-up."""
+    return math.floor(float(rate) * PPM + 0.5)
+
+
+def apply_rate(cents, ppm):
+    """``cents`` times a rate in ppm, half-up to the cent."""
+    return (cents * ppm + _HALF_PPM) // PPM
+
+
+def sum_dollars(amounts):
+    """Exact sum of dollar amounts, each taken to the cent first."""
+    return to_dollars(sum(to_cents(a) for a in amounts))
+
+
+# --- NumPy ---
+def to_cents_array(values):
+    """:func:`to_cents` over an array; returns int64."""
+    import numpy as np
+
+    values = np.asarray(values, dtype=np.float64)
+    scaled = values * 100.0
+    near = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < _TIE)
+    cents = np.floor(scaled + 0.5).astype(np.int64)
+    if near.size:
+        flat = cents.reshape(-1)
+        src = values.reshape(-1)
+        for k in near.tolist():
+            flat[k] = _decimal_cents(src[k])
+    return cents
+
+
+def to_ppm_array(rates):
+    """:func:`to_ppm` over an array; returns int64."""
+    import numpy as np
+
+    return np.floor(np.asarray(rates, dtype=np.float64) * PPM + 0.5).astype(np.int64)
@@ -0,0 +1,193 @@
+"""ReportLab rendering of the EOB statement.
+
+Importing this module loads the ReportLab stack; callers that may never build
+a PDF (the page, the CLI) import it on first use.  The rendered-bytes cache
+lives in :mod:`fsadmin.pdfcache`, which doesn't need ReportLab.
+"""
+import io
+import threading
+from dataclasses import dataclass
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, StyleSheet1, getSampleStyleSheet
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import (
+    Flowable, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+)
+
+from .pdfcache import LOGO_PATH, file_stat
+from .tables import schedule_rows, setup_rows
+
+# --- Static Report Assets ---
+@dataclass(frozen=True)
+class ReportAssets:
+    """Logo and styles shared by every PDF build in the process."""
+    logo_path: str
+    logo_stat: tuple            # (mtime_ns, size) of the logo when loaded, or None
+    logo_bytes: bytes           # None when the logo file is missing
+    logo: ImageReader           # pre-decoded logo, or None
+    styles: StyleSheet1
+    table_style: TableStyle
+    header_style: ParagraphStyle
+    footer_style: ParagraphStyle
+    body_style: ParagraphStyle
+
+
+class _LogoImage(Flowable):
+    """Draws an already decoded ImageReader at a fixed size, centered like ``Image``."""
+
+    def __init__(self, reader, width, height):
+        super().__init__()
+        self.reader = reader
+        self.width = width
+        self.height = height
+        self.hAlign = "CENTER"
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def draw(self):
+        self.canv.drawImage(self.reader, 0, 0, self.width, self.height, mask="auto")
+
+
+def load_assets(logo_path=LOGO_PATH):
+    """Read and decode the logo and build the report styles."""
+    logo_stat = file_stat(logo_path)
+    logo_bytes = logo = None
+    if logo_stat is not None:
+        with open(logo_path, "rb") as f:
+            logo_bytes = f.read()
+        logo = ImageReader(io.BytesIO(logo_bytes))
+        logo.getSize()  # decode now rather than on the first build
+    styles = getSampleStyleSheet()
+    return ReportAssets(
+        logo_path=logo_path,
+        logo_stat=logo_stat,
+        logo_bytes=logo_bytes,
+        logo=logo,
+        styles=styles,
+        table_style=TableStyle([
+            ('GRID',       (0,0), (-1,-1), 0.5, colors.black),
+            ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
+            ('ALIGN',      (0,0), (-1,-1), 'CENTER'),
+            ('FONTSIZE',   (0,0), (-1,-1), 8),
+        ]),
+        header_style=ParagraphStyle('header', fontSize=10, leading=12),
+        footer_style=ParagraphStyle('footer', fontSize=8, leading=10),
+        body_style=ParagraphStyle('body', parent=styles['BodyText'], fontSize=8, leading=10),
+    )
+
+
+_assets = None
+_assets_lock = threading.Lock()
+
+
+def get_assets():
+    """The process-wide :class:`ReportAssets`, loaded on first use."""
+    global _assets
+    assets = _assets
+    if assets is None:
+        with _assets_lock:
+            if _assets is None:
+                _assets = load_assets()
+            assets = _assets
+    return assets
+
+
+def invalidate_assets():
+    """Drop the cached assets; the next build reloads them from disk."""
+    global _assets
+    with _assets_lock:
+        _assets = None
+
+
+def refresh_assets():
+    """Reload the assets if the logo file changed (or appeared/vanished) on disk."""
+    assets = get_assets()
+    if file_stat(assets.logo_path) != assets.logo_stat:
+        invalidate_assets()
+        assets = get_assets()
+    return assets
+
+
+def render_pdf(df_setup, df_schedule, totals, report_date, assets=None):
+    """Build the EOB statement and return the PDF bytes.
+
+    ``df_setup``/``df_schedule`` may be DataFrames or lists of row dicts.
+    ``totals`` needs ``estimated_patient``, ``estimated_insurance`` and
+    ``total_all_upfront``.  The logo is skipped if it could not be loaded.
+    """
+    if assets is None:
+        assets = get_assets()
+    table_style = assets.table_style
+    header_style = assets.header_style
+    footer_style = assets.footer_style
+    body_style = assets.body_style
+    estimated_patient = totals["estimated_patient"]
+    estimated_insurance = totals["estimated_insurance"]
+    total_all_upfront = totals["total_all_upfront"]
+
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=letter,
+        leftMargin=20, rightMargin=20, topMargin=20, bottomMargin=20
+    )
+    elements = []
+
+    # logo (optional)
+    if assets.logo is not None:
+        elements.append(_LogoImage(assets.logo, width=320, height=60))
+    elements.append(Spacer(1, 6))
+
+    # header
+    elements.append(Paragraph(
+        f"Patient Name: __________________   "
+        f"DOB: __________   Date: {report_date:%m/%d/%Y}",
+        header_style
+    ))
+    elements.append(Spacer(1, 12))
+
+    # Table 1: edited setup
+    elements.append(Paragraph("1) Total Due Now (Supplies + First Month)", body_style))
+    data1 = setup_rows(df_setup)
+    t1 = Table(data1, colWidths=[60, 200, 80], hAlign='LEFT')
+    t1.setStyle(table_style)
+    elements += [t1, Spacer(1, 10)]
+
+    # Table 2: rentals
+    elements.append(Paragraph("2) Monthly Rental Schedule", body_style))
+    data2 = schedule_rows(df_schedule)
+    t2 = Table(data2, colWidths=[100,100,100], hAlign='LEFT')
+    t2.setStyle(table_style)
+    elements += [t2, Spacer(1, 10)]
+
+    # Tables 3–5
+    data3 = [["Category","Total"],
+             ["Patient Paid",   f"${estimated_patient:.2f}"],
+             ["Insurance Paid", f"${estimated_insurance:.2f}"]]
+    t3 = Table(data3, colWidths=[180,100], hAlign='LEFT'); t3.setStyle(table_style)
+    elements += [Paragraph("3) Estimated Totals", body_style), t3, Spacer(1, 10)]
+
+    data4 = [["If patient prefers full upfront payment:", f"${estimated_patient:.2f}"]]
+    t4 = Table(data4, colWidths=[180,100], hAlign='LEFT'); t4.setStyle(table_style)
+    elements += [Paragraph("4) Optional Full Prepay Amount", body_style), t4, Spacer(1, 10)]
+
+    data5 = [["Description","Total"],["Combined Cost",f"${total_all_upfront:.2f}"]]
+    t5 = Table(data5, colWidths=[180,100], hAlign='LEFT'); t5.setStyle(table_style)
+    elements += [Paragraph("5) Overall Cost Summary", body_style), t5, Spacer(1, 12)]
+
+    elements.append(Paragraph(
+        "Please select one:   [ ] Monthly Rental Option     [ ] Lump Sum Payment",
+        footer_style
+    ))
+    elements.append(Spacer(1,6))
+    elements.append(Paragraph(
+        "Patient Signature: __________________   Date: __________________",
+        footer_style
+    ))
+
+    # Build PDF (no watermark)
+    doc.build(elements)
+    return buffer.getvalue()
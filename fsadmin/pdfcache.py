@@ -0,0 +1,151 @@
+"""Cache of rendered EOB PDFs, keyed by a content hash of their inputs.
+
+Kept apart from :mod:`fsadmin.pdf` so the page can key and look up PDFs on
+every rerun without importing ReportLab; :func:`render_pdf_cached` loads the
+renderer only on a miss, and :func:`submit_pdf` does the same on an executor.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from .metrics import PDFS, cache_lookup
+
+LOGO_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "SFlogo.PNG")
+
+# Rendered PDFs kept in memory, shared by every session in the process.
+PDF_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def file_stat(path):
+    """``(mtime_ns, size)`` of ``path``, or None if it doesn't exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class BytesLRU:
+    """Thread-safe LRU of ``key -> bytes`` bounded by the total size of the values."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._items[key] = value
+            self._size += len(value)
+            while self._size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._size = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def size(self):
+        return self._size
+
+
+pdf_cache = BytesLRU(PDF_CACHE_MAX_BYTES)
+
+
+def _records(table):
+    return table.to_dict("records") if hasattr(table, "to_dict") else list(table)
+
+
+def pdf_key(df_setup, df_schedule, totals, report_date, logo_path=LOGO_PATH):
+    """Content hash of everything that ends up in the PDF, including the logo file's stat."""
+    payload = {
+        "setup": _records(df_setup),
+        "schedule": _records(df_schedule),
+        "totals": {k: totals[k] for k in ("estimated_patient", "estimated_insurance", "total_all_upfront")},
+        "date": report_date.isoformat(),
+        "logo": file_stat(logo_path),
+    }
+    blob = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.sha256(blob).hexdigest()
+
+
+def render_pdf_cached(df_setup, df_schedule, totals, report_date, key=None, store=None):
+    """:func:`fsadmin.pdf.render_pdf`, served from :data:`pdf_cache` when the inputs were seen before.
+
+    With ``store`` (an :class:`fsadmin.estimates.EstimateStore`) PDFs are also
+    looked up in and saved to it.  The logo is re-read first if it changed on
+    disk, so the PDF always matches the ``logo`` part of the key.  Lookups and
+    renders are counted in :mod:`fsadmin.metrics`.
+    """
+    if key is None:
+        key = pdf_key(df_setup, df_schedule, totals, report_date)
+    pdf = pdf_cache.get(key)
+    cache_lookup("pdf_memory", pdf is not None)
+    if pdf is None and store is not None:
+        pdf = store.get_pdf(key)
+        if pdf is not None:
+            pdf_cache.put(key, pdf)
+    if pdf is None:
+        from .pdf import refresh_assets, render_pdf
+
+        with PDFS.track():
+            pdf = render_pdf(df_setup, df_schedule, totals, report_date, assets=refresh_assets())
+        pdf_cache.put(key, pdf)
+        if store is not None:
+            store.put_pdf(key, pdf)
+    return pdf
+
+
+_in_flight = {}   # key -> Future, shared so concurrent requests for one PDF build it once
+_in_flight_lock = threading.RLock()  # re-entered if the job finishes before add_done_callback
+
+
+def submit_pdf(executor, df_setup, df_schedule, totals, report_date, key=None, store=None):
+    """:func:`render_pdf_cached` on ``executor``; returns a Future of the PDF bytes.
+
+    A cached PDF comes back as an already completed future, and a PDF that is
+    already being built is not submitted twice.  The result goes into
+    :data:`pdf_cache` when the build finishes.
+    """
+    if key is None:
+        key = pdf_key(df_setup, df_schedule, totals, report_date)
+    pdf = pdf_cache.get(key)
+    if pdf is not None:
+        # A miss is counted by render_pdf_cached.
+        cache_lookup("pdf_memory", True)
+        future = Future()
+        future.set_result(pdf)
+        return future
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        if future is None:
+            future = executor.submit(render_pdf_cached, df_setup, df_schedule, totals, report_date, key, store)
+            _in_flight[key] = future
+            future.add_done_callback(lambda _: _forget(key))
+    return future
+
+
+def _forget(key):
+    with _in_flight_lock:
+        _in_flight.pop(key, None)
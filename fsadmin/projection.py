@@ -0,0 +1,138 @@
+"""Multi-year projection of a patient's rental payments over real dates.
+
+:func:`fsadmin.engine.build_schedule` only knows calendar months: it resets the
+deductible whenever the month matches ``reset_date.month``, whatever the year,
+and names months without one.  A projection walks actual billing dates instead:
+rental month ``m`` bills on the effective date plus ``m - 1`` months (same day,
+clamped to the month's length), for as many months as asked.
+
+Plan years: boundaries fall on ``reset_date`` and its anniversaries, before
+it as well as after (a 2026-01-01 reset date means every January 1st);
+boundaries on or before the effective date are already behind the patient
+(``deductible_met``/``oop_met`` describe the plan year in progress).  The first billing on or after a boundary starts
+a new plan year and resets both the deductible and the out-of-pocket max.
+
+Each rental line is adjudicated by the payer rule, as in the schedule loop.
+:func:`fsadmin.vectorized.project_many` is the NumPy counterpart for
+whole-census runs (commercial coinsurance only).
+"""
+import calendar
+from dataclasses import dataclass
+from datetime import date
+from functools import lru_cache
+
+from .engine import FEE_SCHEDULE, compile_fee_schedule
+from .money import to_dollars
+from .rules import COMMERCIAL_COINSURANCE
+
+
+@dataclass(frozen=True)
+class Projection:
+    setup: list       # [{"Code", "Description", "Price"}, ...]
+    schedule: list    # [{"Date", "Month", "Plan Year", "Patient Pays", "Insurance Pays"}, ...] for months 2+
+    totals: dict
+
+
+def add_months(d, months):
+    """``d`` moved by ``months`` calendar months, the day clamped to the month's length."""
+    ym = d.year * 12 + d.month - 1 + months
+    year, month = divmod(ym, 12)
+    month += 1
+    return date(year, month, min(d.day, calendar.monthrange(year, month)[1]))
+
+
+def billing_dates(eff_date, months):
+    """Billing date of rental months ``1..months``; month 1 is the effective date."""
+    return [add_months(eff_date, m - 1) for m in range(1, months + 1)]
+
+
+def first_boundary(eff_date, reset_date):
+    """``k`` such that ``add_months(reset_date, 12 * k)`` is the first plan-year boundary after ``eff_date``."""
+    k = eff_date.year - reset_date.year - 1
+    while add_months(reset_date, 12 * k) <= eff_date:
+        k += 1
+    return k
+
+
+def plan_year_starts(eff_date, reset_date, months):
+    """Rental months (2..months) whose billing is the first on or after a plan-year boundary."""
+    dates = billing_dates(eff_date, months)
+    starts = []
+    k = first_boundary(eff_date, reset_date)
+    boundary = add_months(reset_date, 12 * k)
+    for m in range(2, months + 1):
+        if dates[m - 1] >= boundary:
+            starts.append(m)
+            while boundary <= dates[m - 1]:
+                k += 1
+                boundary = add_months(reset_date, 12 * k)
+    return starts
+
+
+def month_label(d):
+    return f"{calendar.month_name[d.month]} {d.year}"
+
+
+@lru_cache(maxsize=4096)
+def plan_calendar(eff_date, reset_date, months):
+    """``(billing dates, month labels, plan-year starts)`` for one date pair, cached.
+
+    A census shares a handful of (effective date, reset date) pairs, so the
+    date arithmetic is done once per pair rather than once per patient.
+    """
+    dates = tuple(billing_dates(eff_date, months))
+    labels = tuple(month_label(d) for d in dates)
+    return dates, labels, frozenset(plan_year_starts(eff_date, reset_date, months))
+
+
+def project(params, fee_schedule=FEE_SCHEDULE, months=None, rule=None):
+    """Project months 2..``months`` (default: the longest rental) on real dates.
+
+    Months past every rental's ``months`` (or the rule's rental cap) bill
+    nothing; they are there for longer horizons (e.g. resupply after a
+    capped rental).  ``rule`` is the payer rule, see :mod:`fsadmin.rules`.
+    """
+    fees = compile_fee_schedule(fee_schedule)
+    months = fees.horizon if months is None else months
+    dates, labels, starts = plan_calendar(params.eff_date, params.reset_date, months)
+    evaluator = (rule or COMMERCIAL_COINSURANCE).compile(params, fees)
+    adjudicate_lines = evaluator.adjudicate_lines
+    lines_by_month = evaluator.lines_by_month
+    billed_months = len(lines_by_month)
+    plan_year = 1
+    schedule = []
+    total_pat = total_ins = 0
+
+    for m in range(2, months + 1):
+        if m in starts:
+            plan_year += 1
+            evaluator.new_plan_year()
+
+        if m <= billed_months:
+            month_pat, month_ins = adjudicate_lines(lines_by_month[m - 1])
+        else:
+            month_pat = month_ins = 0
+        total_pat += month_pat
+        total_ins += month_ins
+
+        schedule.append({
+            "Date": dates[m - 1].isoformat(),
+            "Month": labels[m - 1],
+            "Plan Year": plan_year,
+            "Patient Pays": to_dollars(month_pat),
+            "Insurance Pays": to_dollars(month_ins),
+        })
+
+    setup = [dict(r) for r in fees.setup_lines]
+    totals = {
+        "setup_total": fees.setup_total,
+        "estimated_patient": to_dollars(fees.setup_cents + total_pat),
+        "estimated_insurance": to_dollars(total_ins),
+        "supply_total": fees.supply_total,
+        "monthly_total": fees.monthly_total,
+        "max_months": fees.horizon,
+        "total_all_upfront": to_dollars(fees.setup_cents + evaluator.rental_allowed),
+        "months": months,
+        "plan_years": plan_year,
+    }
+    return Projection(setup=setup, schedule=schedule, totals=totals)
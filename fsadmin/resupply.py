@@ -0,0 +1,171 @@
+"""Recurring CPAP resupply, projected together with the rental on real dates.
+
+After setup, supplies are replaced on a schedule (cushions every 2 weeks,
+masks and tubing every 3 months, filters monthly).  A resupply rule names a
+fee-schedule code and a replacement frequency::
+
+    {"code": "A7038", "every": 2, "unit": "weeks"}
+
+and is priced from the fee schedule (or its own ``charge``).  The first
+replacement is one interval after the effective date, since setup covers the
+initial supply.
+
+:func:`project_claims` merges rental billings, resupply claims and plan-year
+boundaries (see :mod:`fsadmin.projection`) through one date-ordered event
+queue.  Each source only keeps its next event in the heap, so the work grows
+with the number of claims, not with the horizon times the number of rules.
+Claims are adjudicated one at a time by the payer rule in date order, rentals
+before resupply on the same day, in cents like the schedule loop.
+
+    python -m fsadmin estimate ... --months 73 --resupply
+"""
+import heapq
+from dataclasses import dataclass
+from datetime import timedelta
+
+from .engine import FEE_SCHEDULE, compile_fee_schedule
+from .money import to_cents, to_dollars
+from .projection import add_months, first_boundary, month_label, plan_calendar
+from .rules import COMMERCIAL_COINSURANCE
+
+RESUPPLY_RULES = [
+    {"code": "A7038", "every": 2, "unit": "weeks"},    # mask cushion
+    {"code": "A7037", "every": 3, "unit": "months"},   # mask
+    {"code": "A7033", "every": 1, "unit": "months"},   # filters
+    {"code": "A7035", "every": 3, "unit": "months"},   # tubing
+]
+UNITS = ("weeks", "months")
+
+# Same-day order: a plan-year boundary applies before that day's claims.
+_BOUNDARY, _RENTAL, _RESUPPLY = 0, 1, 2
+
+
+@dataclass(frozen=True)
+class ClaimProjection:
+    setup: list    # [{"Code", "Description", "Price"}, ...]
+    claims: list   # [{"Date", "Month", "Plan Year", "Type", "Code", "Description", "Allowed", "Patient Pays", "Insurance Pays"}, ...]
+    totals: dict
+
+
+def occurrence(start, rule, n):
+    """Date of the ``n``-th replacement after ``start``.
+
+    Counted from ``start`` each time, so a month-end start doesn't drift.
+    """
+    if rule["unit"] == "weeks":
+        return start + timedelta(weeks=rule["every"] * n)
+    return add_months(start, rule["every"] * n)
+
+
+def compile_rules(rules, fee_schedule):
+    """Resupply rules with their fee-schedule item attached; unknown codes need a ``charge``."""
+    fees = compile_fee_schedule(fee_schedule)
+    by_code = {i["code"]: i for i in fees.items}
+    compiled = []
+    for rule in rules:
+        if rule.get("unit") not in UNITS:
+            raise ValueError(f"resupply rule {rule!r}: unit must be one of {', '.join(UNITS)}")
+        if int(rule.get("every", 0)) < 1:
+            raise ValueError(f"resupply rule {rule!r}: every must be a positive integer")
+        item = by_code.get(rule["code"], {})
+        charge = rule.get("charge", item.get("charge"))
+        if charge is None:
+            raise ValueError(f"resupply rule {rule!r}: {rule['code']} is not in the fee schedule and has no charge")
+        compiled.append({
+            "code": rule["code"],
+            "desc": rule.get("desc", item.get("desc", rule["code"])),
+            "charge": charge,
+            "cents": to_cents(charge),
+            "every": int(rule["every"]),
+            "unit": rule["unit"],
+        })
+    return compiled
+
+
+def project_claims(params, fee_schedule=FEE_SCHEDULE, months=None, rules=RESUPPLY_RULES, rule=None):
+    """Rental and resupply claims from the effective date through ``months`` months.
+
+    ``months`` defaults to the longest rental.  Claims dated on or after the
+    effective date plus ``months`` months are left out.  ``rule`` is the payer
+    rule adjudicating every claim (see :mod:`fsadmin.rules`).
+    """
+    fees = compile_fee_schedule(fee_schedule)
+    months = fees.horizon if months is None else months
+    supplies = compile_rules(rules, fees)
+    eff_date, reset_date = params.eff_date, params.reset_date
+    end = add_months(eff_date, months)
+    dates, _, _ = plan_calendar(eff_date, reset_date, months)
+    evaluator = (rule or COMMERCIAL_COINSURANCE).compile(params, fees)
+    adjudicate_lines = evaluator.adjudicate_lines
+    rental_months = min(months, len(evaluator.lines_by_month))
+
+    # (date, order, source, n): source is the rule index for resupply, n the occurrence.
+    queue = []
+    k = first_boundary(eff_date, reset_date)
+    heapq.heappush(queue, (add_months(reset_date, 12 * k), _BOUNDARY, 0, k))
+    if rental_months >= 2:
+        heapq.heappush(queue, (dates[1], _RENTAL, 0, 2))
+    for r, supply in enumerate(supplies):
+        heapq.heappush(queue, (occurrence(eff_date, supply, 1), _RESUPPLY, r, 1))
+
+    plan_year = 1
+    claims = []
+    # cents: [patient, insurance, resupply allowed, resupply patient, resupply insurance]
+    sums = [0, 0, 0, 0, 0]
+
+    while queue:
+        when, kind, source, n = heapq.heappop(queue)
+        if when >= end:
+            continue
+        if kind == _BOUNDARY:
+            plan_year += 1
+            evaluator.new_plan_year()
+            heapq.heappush(queue, (add_months(reset_date, 12 * (n + 1)), _BOUNDARY, 0, n + 1))
+            continue
+        if kind == _RENTAL:
+            lines = evaluator.lines_by_month[n - 1]
+            items = [fees.monthly[j] for j, _ in lines]
+            claim_type = "rental"
+            if n < rental_months:
+                heapq.heappush(queue, (dates[n], _RENTAL, 0, n + 1))
+        else:
+            supply = supplies[source]
+            lines = ((source, supply["cents"]),)
+            items = (supply,)
+            claim_type = "resupply"
+            heapq.heappush(queue, (occurrence(eff_date, supply, n + 1), _RESUPPLY, source, n + 1))
+
+        out = []
+        adjudicate_lines(lines, out)
+        for item, (_, allowed), (pat, ins) in zip(items, lines, out):
+            sums[0] += pat
+            sums[1] += ins
+            if kind == _RESUPPLY:
+                sums[2] += allowed
+                sums[3] += pat
+                sums[4] += ins
+            claims.append({
+                "Date": when.isoformat(),
+                "Month": month_label(when),
+                "Plan Year": plan_year,
+                "Type": claim_type,
+                "Code": item["code"],
+                "Description": item["desc"],
+                "Allowed": to_dollars(allowed),
+                "Patient Pays": to_dollars(pat),
+                "Insurance Pays": to_dollars(ins),
+            })
+
+    setup = [dict(r) for r in fees.setup_lines]
+    totals = {
+        "setup_total": fees.setup_total,
+        "estimated_patient": to_dollars(fees.setup_cents + sums[0]),
+        "estimated_insurance": to_dollars(sums[1]),
+        "resupply_allowed": to_dollars(sums[2]),
+        "resupply_patient": to_dollars(sums[3]),
+        "resupply_insurance": to_dollars(sums[4]),
+        "claims": len(claims),
+        "months": months,
+        "plan_years": plan_year,
+    }
+    return ClaimProjection(setup=setup, claims=claims, totals=totals)
@@ -0,0 +1,263 @@
+"""Payer benefit rules: how each claim line splits between patient and insurance.
+
+A rule is declared once and compiled per patient into an :class:`Evaluator`:
+a table of the rental lines billed each month (after any rental cap or rate
+step, built once per fee schedule) and closures adjudicating claim lines
+that carry the deductible and out-of-pocket accumulators.  A whole month of
+lines is adjudicated in one call, so the loop over lines stays inside the
+compiled closure.  The schedule loop, the projection and the resupply engine
+all go through an evaluator, so a payer's logic lives in one place.
+
+:class:`BenefitRule` covers the usual plan shapes declaratively (patient or
+separate DME deductible, coinsurance or per-claim copay, OOP max on/off,
+capped rentals, rate steps); anything else can subclass :class:`PayerRule`
+and implement :meth:`PayerRule.compile`.  Rules are registered by name with
+:func:`register_rule` and mapped to payer IDs with :func:`register_payer`::
+
+    register_payer("ACME", register_rule(BenefitRule("acme_copay", copay=30.0)))
+    rule_for("ACME")
+
+``commercial_coinsurance`` is the original deductible -> coinsurance -> OOP
+cascade and the rule for any payer without one.
+
+Evaluators work in integer cents with the rounding rules of
+:mod:`fsadmin.money`.
+"""
+from dataclasses import dataclass
+
+from .money import PPM, apply_rate, to_cents, to_ppm
+
+
+@dataclass(frozen=True)
+class Evaluator:
+    """A rule compiled for one patient and fee schedule."""
+    lines_by_month: list    # [m - 1] -> ((rental item index, allowed cents), ...) billed in rental month m
+    rental_allowed: int     # allowed cents of rental months 2+ (month 1 is billed with setup)
+    adjudicate_lines: object  # adjudicate_lines(lines, out=None) -> summed (patient, insurance) cents;
+                              # per-line (patient, insurance) pairs are appended to ``out``
+    reset_deductible: object
+    new_plan_year: object  # resets the deductible and the out-of-pocket max
+
+
+class PayerRule:
+    """Base class for payer rules; subclasses implement :meth:`compile`."""
+
+    name = None
+    description = ""
+
+    def compile(self, params, fees):
+        """An :class:`Evaluator` for ``params`` over a CompiledFeeSchedule."""
+        raise NotImplementedError
+
+    @property
+    def key(self):
+        """Hashable identity of the rule and its options, for cache keys."""
+        return (type(self).__name__, self.name)
+
+
+@dataclass(frozen=True)
+class BenefitRule(PayerRule):
+    """Declarative benefit design.
+
+    ``deductible``: None uses the patient's deductible (and what they already
+    met); a number is a separate DME deductible of that amount, starting
+    unmet; 0 means no deductible.  ``coinsurance``: None uses the patient's
+    rate.  ``copay`` > 0 charges that flat amount per claim line after the
+    deductible instead of coinsurance.  ``oop=False`` ignores the OOP max.
+    ``rental_cap`` is the last rental month billed and ``rate_steps`` are
+    ``(from_month, factor)`` pairs scaling the rental charge from that month.
+    """
+    name: str
+    description: str = ""
+    deductible: float = None
+    coinsurance: float = None
+    copay: float = 0.0
+    oop: bool = True
+    rental_cap: int = None
+    rate_steps: tuple = ()
+
+    @property
+    def key(self):
+        return (type(self).__name__, self.name, self.deductible, self.coinsurance,
+                self.copay, self.oop, self.rental_cap, self.rate_steps)
+
+    def _factor(self, m):
+        factor = PPM
+        for start, f in self.rate_steps:
+            if m >= start:
+                factor = to_ppm(f)
+        return factor
+
+    def _lines_by_month(self, fees):
+        # (table, allowed cents of months 2+).  Only depends on the fee
+        # schedule, so it is built once per schedule.
+        key = ("lines_by_month", self.rental_cap, self.rate_steps)
+        cached = fees.derived.get(key)
+        if cached is None:
+            charges = fees.rental_cents
+            horizon = fees.horizon if self.rental_cap is None else min(fees.horizon, self.rental_cap)
+            table = []
+            for m in range(1, horizon + 1):
+                factor = self._factor(m)
+                if factor == PPM:
+                    table.append(tuple((j, charges[j]) for j in fees.active_by_month[m - 1]))
+                else:
+                    table.append(tuple((j, apply_rate(charges[j], factor)) for j in fees.active_by_month[m - 1]))
+            allowed = sum(a for lines in table[1:] for _, a in lines)
+            cached = fees.derived[key] = (table, allowed)
+        return cached
+
+    def compile(self, params, fees):
+        lines_by_month, rental_allowed = self._lines_by_month(fees)
+
+        if self.deductible is None:
+            deductible_total = to_cents(params.deductible_total)
+            ded = max(deductible_total - to_cents(params.deductible_met), 0)
+        else:
+            deductible_total = ded = to_cents(self.deductible)
+        # The out-of-pocket accumulator is kept in cents * PPM: coinsurance
+        # is only rounded once per claim, so the exact remainder carries over.
+        if self.oop:
+            oop_max = to_cents(params.oop_max) * PPM
+            oop = max(oop_max - to_cents(params.oop_met) * PPM, 0)
+        else:
+            oop_max = oop = float("inf")
+        rate = to_ppm(params.coinsurance_rate if self.coinsurance is None else self.coinsurance)
+        copay = to_cents(self.copay) * PPM
+        half = PPM // 2
+
+        # One closure per benefit shape, so the per-line loop has no option checks.
+        # Each line's patient share is worked out exactly (cents * PPM); the
+        # running total is rounded half-up to the cent and each line gets the
+        # difference, so the claim is rounded once and its lines add up to it.
+        if copay > 0:
+            def adjudicate_lines(lines, out=None):
+                nonlocal ded, oop
+                ded_left, oop_left = ded, oop   # locals in the loop, cells are slower
+                total_pat = total_ins = exact_pat = 0
+                for _, allowed in lines:
+                    # apply deductible
+                    if ded_left > 0:
+                        use = min(allowed, ded_left)
+                        ded_left -= use
+                        rem = allowed - use
+                    else:
+                        use = 0
+                        rem = allowed
+                    exact_pat += use * PPM
+
+                    # copay/OOP on remainder
+                    if rem > 0 and oop_left > 0:
+                        copay_pat = min(copay, rem * PPM, oop_left)
+                        exact_pat += copay_pat
+                        oop_left -= copay_pat
+
+                    billed = (exact_pat + half) // PPM
+                    pat = billed - total_pat
+                    ins = allowed - pat
+                    total_pat = billed
+                    total_ins += ins
+                    if out is not None:
+                        out.append((pat, ins))
+                ded, oop = ded_left, oop_left
+                return total_pat, total_ins
+        else:
+            def adjudicate_lines(lines, out=None):
+                nonlocal ded, oop
+                ded_left, oop_left = ded, oop   # locals in the loop, cells are slower
+                total_pat = total_ins = exact_pat = 0
+                for _, allowed in lines:
+                    # apply deductible
+                    if ded_left > 0:
+                        use = min(allowed, ded_left)
+                        ded_left -= use
+                        rem = allowed - use
+                    else:
+                        use = 0
+                        rem = allowed
+                    exact_pat += use * PPM
+
+                    # coinsurance/OOP on remainder
+                    if rem > 0 and oop_left > 0:
+                        coins_pat = min(rem * rate, oop_left)
+                        exact_pat += coins_pat
+                        oop_left -= coins_pat
+
+                    billed = (exact_pat + half) // PPM
+                    pat = billed - total_pat
+                    ins = allowed - pat
+                    total_pat = billed
+                    total_ins += ins
+                    if out is not None:
+                        out.append((pat, ins))
+                ded, oop = ded_left, oop_left
+                return total_pat, total_ins
+
+        def reset_deductible():
+            nonlocal ded
+            ded = deductible_total
+
+        def new_plan_year():
+            nonlocal ded, oop
+            ded = deductible_total
+            oop = oop_max
+
+        return Evaluator(lines_by_month, rental_allowed, adjudicate_lines, reset_deductible, new_plan_year)
+
+
+# --- Registry ---
+RULES = {}        # rule name -> PayerRule
+PAYER_RULES = {}  # payer ID -> rule name
+
+
+def register_rule(rule):
+    """Make ``rule`` available by ``rule.name``; returns it."""
+    RULES[rule.name] = rule
+    return rule
+
+
+def register_payer(payer, rule):
+    """Use ``rule`` (a registered name or a PayerRule) for ``payer``."""
+    name = rule if isinstance(rule, str) else register_rule(rule).name
+    if name not in RULES:
+        raise KeyError(f"unknown payer rule {name!r}")
+    PAYER_RULES[payer] = name
+
+
+def get_rule(name):
+    try:
+        return RULES[name]
+    except KeyError:
+        raise KeyError(f"unknown payer rule {name!r} (known: {', '.join(sorted(RULES))})") from None
+
+
+def rule_for(payer):
+    """The rule registered for ``payer``, else :data:`COMMERCIAL_COINSURANCE`."""
+    name = PAYER_RULES.get(payer)
+    return COMMERCIAL_COINSURANCE if name is None else RULES[name]
+
+
+COMMERCIAL_COINSURANCE = register_rule(BenefitRule(
+    "commercial_coinsurance",
+    "Deductible, then coinsurance until the out-of-pocket max is met.",
+))
+register_rule(BenefitRule(
+    "commercial_copay",
+    "Deductible, then a $25 copay per claim line until the out-of-pocket max is met.",
+    copay=25.0,
+))
+register_rule(BenefitRule(
+    "dme_deductible",
+    "Separate $500 DME deductible, then coinsurance until the out-of-pocket max is met.",
+    deductible=500.0,
+))
+register_rule(BenefitRule(
+    "medicare_capped_rental",
+    "Medicare capped rental: 13 rental months, 75% of the rental fee from month 4,"
+    " patient's Part B deductible then 20% coinsurance, no out-of-pocket max.",
+    coinsurance=0.20,
+    oop=False,
+    rental_cap=13,
+    rate_steps=((4, 0.75),),
+))
+register_payer("MEDICARE", "medicare_capped_rental")
@@ -0,0 +1,42 @@
+"""Display rows for the setup and schedule tables, shared by the PDF and other exporters.
+
+Tables are converted a column at a time (``Series.tolist()`` for DataFrames,
+one pass per column for lists of dicts) instead of building a Series per row
+with ``iterrows()``.
+"""
+
+# (source column, display header)
+SETUP_COLUMNS = [("Code", "CPT Code"), ("Description", "Description"), ("Price", "Price ($)")]
+SCHEDULE_COLUMNS = [("Month", "Month"), ("Patient Pays", "Patient Pays"), ("Insurance Pays", "Insurance Pays")]
+MONEY_COLUMNS = frozenset({"Price", "Patient Pays", "Insurance Pays"})
+
+_money = "${:.2f}".format
+
+
+def column(table, name):
+    """One column of a DataFrame or a list of dicts as a plain list."""
+    if hasattr(table, "columns"):
+        return table[name].tolist()
+    return [r[name] for r in table]
+
+
+def format_money(values):
+    """``1234.5 -> "$1234.50"`` for a whole column."""
+    return list(map(_money, values))
+
+
+def table_rows(table, columns, money=MONEY_COLUMNS):
+    """Header row plus display rows for ``table``, money columns formatted as dollars."""
+    cols = []
+    for name, _ in columns:
+        values = column(table, name)
+        cols.append(format_money(values) if name in money else values)
+    return [[header for _, header in columns]] + [list(row) for row in zip(*cols)]
+
+
+def setup_rows(table):
+    return table_rows(table, SETUP_COLUMNS)
+
+
+def schedule_rows(table):
+    return table_rows(table, SCHEDULE_COLUMNS)
@@ -0,0 +1,136 @@
+"""Per-stage wall-clock timers for page reruns (or any repeated run).
+
+    timer = StageTimer(enabled=True)
+    timer.start_run()
+    with timer.stage("schedule"):
+        ...
+    timer.finish_run()
+    timer.last_run        # {"schedule": 0.0012, ..., "total": 0.034}
+
+A stage entered twice in one run adds up.  Work finishing on another thread
+(a PDF build) reports through :meth:`StageTimer.record`.  The most recent
+runs are kept for :meth:`StageTimer.summary` and the JSON / Prometheus text
+exports.
+
+Disabled, :meth:`StageTimer.stage` hands back one shared no-op context
+manager and the other methods return immediately, so the calls can stay in
+the hot path.
+"""
+import json
+import threading
+import time
+from collections import deque
+
+# Runs kept for the summary and exports.
+TIMING_HISTORY = 50
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+class _Stage:
+    __slots__ = ("_timer", "_name", "_start")
+
+    def __init__(self, timer, name):
+        self._timer = timer
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._timer.record(self._name, time.perf_counter() - self._start)
+        return False
+
+
+class StageTimer:
+    """Stage timings of the current run and the last :data:`TIMING_HISTORY` runs."""
+
+    def __init__(self, enabled=False, history=TIMING_HISTORY):
+        self.enabled = enabled
+        self.runs = deque(maxlen=history)   # {stage: seconds} per run, oldest first
+        self._current = None
+        self._started = None
+        self._lock = threading.Lock()
+
+    def start_run(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._current = {}
+            self._started = time.perf_counter()
+            self.runs.append(self._current)
+
+    def finish_run(self):
+        """Record the run's ``total`` since :meth:`start_run`."""
+        if self._current is not None and self.enabled:
+            self.record("total", time.perf_counter() - self._started)
+
+    def stage(self, name):
+        """Context manager timing ``name`` in the current run."""
+        if not self.enabled or self._current is None:
+            return _NO_STAGE
+        return _Stage(self, name)
+
+    def record(self, name, seconds):
+        """Add ``seconds`` to stage ``name`` of the current run; safe from any thread."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._current is not None:
+                self._current[name] = self._current.get(name, 0.0) + seconds
+
+    @property
+    def last_run(self):
+        with self._lock:
+            return dict(self.runs[-1]) if self.runs else {}
+
+    def summary(self):
+        """``{stage: {"count", "sum", "mean", "max", "last"}}`` over the kept runs, in seconds."""
+        with self._lock:
+            runs = [dict(r) for r in self.runs]
+        stats = {}
+        for run in runs:
+            for name, seconds in run.items():
+                s = stats.setdefault(name, {"count": 0, "sum": 0.0, "max": 0.0, "last": 0.0})
+                s["count"] += 1
+                s["sum"] += seconds
+                s["max"] = max(s["max"], seconds)
+                s["last"] = seconds
+        return {
+            name: dict(s, mean=s["sum"] / s["count"]) for name, s in stats.items()
+        }
+
+    # --- Export ---
+    def to_json(self, indent=None):
+        with self._lock:
+            runs = [dict(r) for r in self.runs]
+        return json.dumps({"runs": runs, "summary": self.summary()}, indent=indent)
+
+    def to_prometheus(self, prefix="fsadmin_page"):
+        """The kept runs in the Prometheus text exposition format."""
+        summary = self.summary()
+        name = f"{prefix}_stage_seconds"
+        out = [
+            f"# HELP {name} Seconds spent in each stage over the last {self.runs.maxlen} runs.",
+            f"# TYPE {name} summary",
+        ]
+        for stage, s in summary.items():
+            out.append(f'{name}_sum{{stage="{stage}"}} {s["sum"]!r}')
+            out.append(f'{name}_count{{stage="{stage}"}} {s["count"]}')
+        last = f"{prefix}_stage_last_seconds"
+        out += [f"# HELP {last} Seconds spent in each stage the last time it ran.", f"# TYPE {last} gauge"]
+        for stage, s in summary.items():
+            out.append(f'{last}{{stage="{stage}"}} {s["last"]!r}')
+        return "\n".join(out) + "\n"
@@ -0,0 +1,213 @@
+"""Vectorized (NumPy) version of the rental schedule for many patients at once.
+
+The result is a patient x month matrix of patient-pays / insurance-pays.  The
+cascade still steps through the (short) month x rental-item axis, but each
+step is a whole column operation across every patient.  Amounts are int64
+cents with the rounding rules of :mod:`fsadmin.money`, the same integer
+operations as :func:`fsadmin.engine.build_schedule`, so the output is
+identical to the scalar loop.  Months are accumulated as contiguous (m, n)
+rows and handed back transposed.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from .engine import FEE_SCHEDULE, compile_fee_schedule
+from .money import PPM, to_cents_array, to_ppm_array
+
+
+@dataclass(frozen=True)
+class ScheduleMatrix:
+    months: np.ndarray          # (m,) rental month numbers, 2..max_months
+    month_index: np.ndarray     # (n, m) calendar month 1-12 for each patient/month
+    patient_cents: np.ndarray   # (n, m) int64
+    insurance_cents: np.ndarray # (n, m) int64
+    totals: dict                # name -> (n,) array, same keys as engine.compute_totals
+
+    @property
+    def patient_pays(self):
+        """(n, m) dollars."""
+        return self.patient_cents / 100
+
+    @property
+    def insurance_pays(self):
+        """(n, m) dollars."""
+        return self.insurance_cents / 100
+
+
+def params_arrays(params_list):
+    """Column arrays for :func:`schedule_matrix` from a sequence of InsuranceParams."""
+    n = len(params_list)
+    cols = {
+        "eff_month": np.empty(n, dtype=np.int64),
+        "reset_month": np.empty(n, dtype=np.int64),
+        "deductible_total": np.empty(n),
+        "deductible_met": np.empty(n),
+        "oop_max": np.empty(n),
+        "oop_met": np.empty(n),
+        "coinsurance_rate": np.empty(n),
+    }
+    for k, p in enumerate(params_list):
+        cols["eff_month"][k] = p.eff_date.month
+        cols["reset_month"][k] = p.reset_date.month
+        cols["deductible_total"][k] = p.deductible_total
+        cols["deductible_met"][k] = p.deductible_met
+        cols["oop_max"][k] = p.oop_max
+        cols["oop_met"][k] = p.oop_met
+        cols["coinsurance_rate"][k] = p.coinsurance_rate
+    return cols
+
+
+def schedule_matrix(eff_month, reset_month, deductible_total, deductible_met,
+                    oop_max, oop_met, coinsurance_rate, fee_schedule=FEE_SCHEDULE):
+    """Compute the months-2+ schedule for ``n`` patients given (n,) parameter arrays."""
+    eff_month = np.asarray(eff_month, dtype=np.int64)
+    reset_month = np.asarray(reset_month, dtype=np.int64)
+    deductible_total = to_cents_array(deductible_total)
+    rate = to_ppm_array(coinsurance_rate)
+    n = eff_month.shape[0]
+
+    fees = compile_fee_schedule(fee_schedule)
+    months = np.arange(2, fees.horizon + 1)
+    m = months.size
+
+    ded = np.maximum(deductible_total - to_cents_array(deductible_met), 0)
+    oop = np.maximum(to_cents_array(oop_max) - to_cents_array(oop_met), 0) * PPM
+    month_index = (eff_month[:, None] + months[None, :] - 2) % 12 + 1
+    pat = np.empty((m, n), dtype=np.int64)
+    ins = np.empty((m, n), dtype=np.int64)
+
+    for j in range(m):
+        reset = month_index[:, j] == reset_month
+        ded = np.where(reset, deductible_total, ded)
+        _adjudicate_month(fees.active_by_month[months[j] - 1], fees, ded, oop, rate, pat[j], ins[j])
+
+    return ScheduleMatrix(
+        months=months,
+        month_index=month_index,
+        patient_cents=pat.T,
+        insurance_cents=ins.T,
+        totals=_totals(pat, ins, fees),
+    )
+
+
+def _adjudicate_month(active, fees, ded, oop, rate, month_pat, month_ins):
+    # One month's rental lines for every patient; ``ded``/``oop`` are updated
+    # in place and the month's sums written to the ``month_pat``/``month_ins``
+    # rows.  As in the scalar loop, ``oop`` and the patient share are exact
+    # (cents * PPM) and the month is rounded once.
+    exact_pat = np.zeros_like(month_pat)
+    allowed_total = 0
+    for item in active:
+        allowed = fees.rental_cents[item]
+        allowed_total += allowed
+
+        # apply deductible
+        use = np.where(ded > 0, np.minimum(allowed, ded), 0)
+        ded -= use
+        rem = allowed - use
+        exact_pat += use * PPM
+
+        # coinsurance/OOP on remainder
+        coins = (rem > 0) & (oop > 0)
+        coins_pat = np.where(coins, np.minimum(rem * rate, oop), 0)
+        oop -= coins_pat
+        exact_pat += coins_pat
+    month_pat[:] = (exact_pat + PPM // 2) // PPM
+    month_ins[:] = allowed_total - month_pat
+
+
+def _totals(pat, ins, fees):
+    # ``pat``/``ins`` are (m, n) cents; integer sums are exact in any order.
+    n = pat.shape[1]
+    setup_cents = fees.setup_cents
+    return {
+        "setup_total": np.full(n, fees.setup_total),
+        "estimated_patient": (setup_cents + pat.sum(axis=0)) / 100,
+        "estimated_insurance": ins.sum(axis=0) / 100,
+        "supply_total": np.full(n, fees.supply_total),
+        "monthly_total": np.full(n, fees.monthly_total),
+        "max_months": np.full(n, fees.horizon),
+        "total_all_upfront": np.full(n, fees.total_all_upfront),
+    }
+
+
+def estimate_many(params_list, fee_schedule=FEE_SCHEDULE):
+    """Vectorized counterpart of :func:`fsadmin.engine.estimate` for a list of InsuranceParams."""
+    return schedule_matrix(fee_schedule=compile_fee_schedule(fee_schedule), **params_arrays(params_list))
+
+
+# --- Multi-Year Projection ---
+@dataclass(frozen=True)
+class ProjectionMatrix:
+    months: np.ndarray          # (m,) rental month numbers, 2..months
+    group: np.ndarray           # (n,) row of ``dates``/``plan_year`` for each patient
+    dates: list                 # per group: billing dates of months 2..months
+    plan_year: np.ndarray       # (g, m) plan year of each month per group
+    patient_cents: np.ndarray   # (n, m) int64
+    insurance_cents: np.ndarray # (n, m) int64
+    totals: dict                # name -> (n,) array, same keys as projection.project
+
+    patient_pays = ScheduleMatrix.patient_pays
+    insurance_pays = ScheduleMatrix.insurance_pays
+
+
+def project_many(params_list, fee_schedule=FEE_SCHEDULE, months=None):
+    """Vectorized counterpart of :func:`fsadmin.projection.project` for a list of InsuranceParams.
+
+    Billing dates and plan-year boundaries only depend on the (effective date,
+    reset date) pair, so they are worked out once per distinct pair with the
+    scalar helpers and broadcast; the cascade then runs column by column.
+    """
+    from .projection import plan_calendar
+
+    fees = compile_fee_schedule(fee_schedule)
+    months = fees.horizon if months is None else months
+    month_numbers = np.arange(2, months + 1)
+    m = month_numbers.size
+    n = len(params_list)
+
+    groups = {}
+    group = np.empty(n, dtype=np.int64)
+    for k, p in enumerate(params_list):
+        group[k] = groups.setdefault((p.eff_date, p.reset_date), len(groups))
+    dates = []
+    starts = np.zeros((len(groups), m), dtype=bool)
+    plan_year = np.ones((len(groups), m), dtype=np.int64)
+    for g, (eff_date, reset_date) in enumerate(groups):
+        billing, _, plan_starts = plan_calendar(eff_date, reset_date, months)
+        dates.append(billing[1:])
+        for s in plan_starts:
+            starts[g, s - 2] = True
+        plan_year[g] = 1 + np.cumsum(starts[g])
+
+    cols = params_arrays(params_list)
+    deductible_total = to_cents_array(cols["deductible_total"])
+    oop_max = to_cents_array(cols["oop_max"]) * PPM
+    rate = to_ppm_array(cols["coinsurance_rate"])
+    ded = np.maximum(deductible_total - to_cents_array(cols["deductible_met"]), 0)
+    oop = np.maximum(oop_max - to_cents_array(cols["oop_met"]) * PPM, 0)
+    pat = np.zeros((m, n), dtype=np.int64)
+    ins = np.zeros((m, n), dtype=np.int64)
+
+    for j in range(m):
+        reset = starts[group, j]
+        if reset.any():
+            ded = np.where(reset, deductible_total, ded)
+            oop = np.where(reset, oop_max, oop)
+        if month_numbers[j] > fees.horizon:
+            continue
+        _adjudicate_month(fees.active_by_month[month_numbers[j] - 1], fees, ded, oop, rate, pat[j], ins[j])
+
+    totals = _totals(pat, ins, fees)
+    totals["months"] = np.full(n, months)
+    totals["plan_years"] = plan_year[group, -1] if m else np.ones(n, dtype=np.int64)
+    return ProjectionMatrix(
+        months=month_numbers,
+        group=group,
+        dates=dates,
+        plan_year=plan_year,
+        patient_cents=pat.T,
+        insurance_cents=ins.T,
+        totals=totals,
+    )